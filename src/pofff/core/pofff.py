@@ -10,6 +10,7 @@ from pofff.utils.inputvalues import process_input
 from pofff.utils.runs import flow, data, benchmark, everest, ert
 from pofff.utils.writefile import opm_files
 from pofff.utils.mapproperties import grid, positions
+from pofff.utils.cache import load_cache, save_cache
 
 
 def pofff():
@@ -46,8 +47,12 @@ def pofff():
         os.chdir(f"{dic['fol']}")
         if dic["mode"] not in ["none", "data"]:
             print("\nGenerating the input files, please wait.")
-            grid(dic)  # Initialize the grid
-            positions(dic)  # Get the sand and source positions
+            if load_cache(dic):  # Reuse the grid and positions from a previous run
+                print("Using the cached grid and positions.")
+            else:
+                grid(dic)  # Initialize the grid
+                positions(dic)  # Get the sand and source positions
+                save_cache(dic)
             opm_files(dic)  # Write used opm related files
     else:
         os.chdir(f"{dic['fol']}")
@@ -55,6 +60,7 @@ def pofff():
         dic["figures"] = "all"
         dic["times"] = "24,48,72,96,120"
         dic["experiment"] = "run2"
+        dic["emd_backend"] = "pot"
     if dic["mode"] == "single":
         print("\nRunning the simulation, please wait.")
         flow(dic)
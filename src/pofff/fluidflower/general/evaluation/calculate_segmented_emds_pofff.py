@@ -11,40 +11,13 @@ import os
 import os.path
 import argparse
 import numpy as np
-from PIL import Image
 import pofff.fluidflower.general.visualization.generate_segmented_images as seg
-from pofff.fluidflower.general.evaluation import emd
+from pofff.utils.emd import segmented_emd
 
 
-def calculateEMD(modelResult, experimentalData):
+def calculateEMD(modelResult, experimentalData, backend="pot"):
     """Calculate Wasserstein distance"""
-    modImage = Image.new("L", (280, 120))
-    modPixels = modImage.load()
-    for i in range(0, modImage.size[0]):
-        for j in range(0, modImage.size[1]):
-            if modelResult[j, i] == 1:
-                modPixels[i, j] = 128
-            elif modelResult[j, i] == 2:
-                modPixels[i, j] = 255
-            else:
-                modPixels[i, j] = 0
-
-    modImage.save("mod0.png")
-
-    expImage = Image.new("L", (280, 120))
-    expPixels = expImage.load()
-    for i in range(0, expImage.size[0]):
-        for j in range(0, expImage.size[1]):
-            if experimentalData[j, i] == 1:
-                expPixels[i, j] = 128
-            elif experimentalData[j, i] == 2:
-                expPixels[i, j] = 255
-            else:
-                expPixels[i, j] = 0
-
-    expImage.save("exp0.png")
-
-    return emd.calculateEMD("mod0.png", "exp0.png")
+    return segmented_emd(modelResult, experimentalData, backend=backend)
 
 
 def calculate_segmented_emds():
@@ -80,6 +53,15 @@ def calculate_segmented_emds():
         default="1",
         help="Add the result to the plots ('1' by default).",
     )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        default="pot",
+        help="Method to compute the Wasserstein distance, 'pot', 'pot-mt' (POT with "
+        "all cores), 'cv2' (OpenCV), 'grid' (L1 ground cost on the 280x120 maps "
+        "instead of 140x60 images), or 'pyramid' (coarse to fine images) ('pot' by "
+        "default).",
+    )
 
     cmdargs = vars(parser.parse_args())
     add = cmdargs["add"] == "1"
@@ -200,7 +182,9 @@ def calculate_segmented_emds():
                         )
 
                     col = int((hourJ / 24 - 1) * numGroupsPlusExps + j)
-                    distances[row][col] = calculateEMD(modelResultI, modelResultJ)
+                    distances[row][col] = calculateEMD(
+                        modelResultI, modelResultJ, cmdargs["backend"]
+                    )
 
                     print(
                         f"{hourI}, {hourJ}, {i}, {j} -> ({row}, {col}): {distances[row][col]}"
@@ -224,7 +208,9 @@ def calculate_segmented_emds():
                     experimentalDataJ = experimentalDataJ[30:, :]
 
                     col = int((hourJ / 24 - 1) * numGroupsPlusExps + j)
-                    distances[row][col] = calculateEMD(modelResultI, experimentalDataJ)
+                    distances[row][col] = calculateEMD(
+                        modelResultI, experimentalDataJ, cmdargs["backend"]
+                    )
 
                     print(
                         f"{hourI}, {hourJ}, {i}, {j} -> ({row}, {col}): {distances[row][col]}"
@@ -287,7 +273,9 @@ def calculate_segmented_emds():
                         )
 
                     col = int((hourJ / 24 - 1) * numGroupsPlusExps + j)
-                    distances[row][col] = calculateEMD(experimentalDataI, modelResultJ)
+                    distances[row][col] = calculateEMD(
+                        experimentalDataI, modelResultJ, cmdargs["backend"]
+                    )
 
                     print(
                         f"{hourI}, {hourJ}, {i}, {j} -> ({row}, {col}): {distances[row][col]}"
@@ -312,7 +300,7 @@ def calculate_segmented_emds():
 
                     col = int((hourJ / 24 - 1) * numGroupsPlusExps + j)
                     distances[row][col] = calculateEMD(
-                        experimentalDataI, experimentalDataJ
+                        experimentalDataI, experimentalDataJ, cmdargs["backend"]
                     )
 
                     print(
@@ -11,6 +11,7 @@ lines based on the experimental data.
 import argparse
 import numpy as np
 from PIL import Image
+from pofff.utils.segmentation import LAYOUTS, grid_size, read_map, segment
 
 
 def generateImages(
@@ -147,44 +148,12 @@ def generateImages(
 
 def generateSegmentMap(fileName, xmin, xmax, ymin, ymax, satmin, conmin):
     "Generate segmented map"
-    xSpace = np.arange(xmin, xmax + 5.0e-3, 1.0e-2)
-    ySpace = np.arange(ymin, ymax + 5.0e-3, 1.0e-2)
-    nX = xSpace.size - 1
-    nY = ySpace.size - 1
-
-    skip_header = 0
-    with open(fileName, "r", encoding="utf8") as file:
-        if not (file.readline()[0]).isnumeric():
-            skip_header = 1
-
-    saturation = np.zeros([nY, nX])
-    concentration = np.zeros([nY, nX])
-    csvData = np.genfromtxt(fileName, delimiter=",", skip_header=skip_header)
-    for i in np.arange(0, nY):
-        saturation[i, :] = csvData[i * nX : (i + 1) * nX, 2]
-        concentration[i, :] = csvData[i * nX : (i + 1) * nX, 3]
-
-    segmentMap = np.zeros((120, 280), dtype=int)
-
-    if not ((nX == 286 and nY == 123) or (nX == 280 and nY == 120)):
+    nX, nY = grid_size([xmin, xmax], [ymin, ymax])
+    if (nX, nY) not in LAYOUTS:
         print("Warning: wrong dimensions. Return 0 segment map.")
-        return segmentMap
-
-    offset = 0
-    if nX == 286:
-        offset = 3
-
-    # Start from the fourth row as the first three are not contained in the experimental data
-    for i in np.arange(offset, nY):
-        # For the same reason, exclude the first and last three columns
-        for j in np.arange(offset, nX - offset):
-            # The first row of the segment map corresponds to the top of the domain
-            if saturation[i, j] > satmin:
-                segmentMap[119 + offset - i, j - offset] = 2
-            elif concentration[i, j] > conmin:
-                segmentMap[119 + offset - i, j - offset] = 1
+        return np.zeros((120, 280), dtype=int)
 
-    return segmentMap
+    return segment(*read_map(fileName, (nX, nY)), satmin, conmin)
 
 
 def generateSegmentedImages():
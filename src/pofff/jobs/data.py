@@ -11,17 +11,25 @@ import argparse
 import os
 import sys
 from io import StringIO
-from scipy.interpolate import interp1d
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from opm.io.ecl import EclFile as OpmFile
-from opm.io.ecl import EGrid as OpmGrid
-from opm.io.ecl import ERst as OpmRestart
 from opm.io.ecl import ESmry as OpmSummary
 
 GAS_DEN_REF = 1.86843
 WAT_DEN_REF = 998.108
 SECONDS_IN_YEAR = 31536000
 KMOL_TO_KG = 1e3 * 0.044
+# Data type and number of values per record of the arrays in the binary files
+ECL_TYPES = {
+    "INTE": (">i4", 1000),
+    "REAL": (">f4", 1000),
+    "DOUB": (">f8", 1000),
+    "LOGI": (">i4", 1000),
+    "CHAR": ("S8", 105),
+    "MESS": ("S1", 1),
+}
+# Dictionaries and function used by each process of the pool
+WORKER = {}
 
 
 def main():
@@ -46,12 +54,36 @@ def main():
         default="/Users/dmar/Github/pofff/src/pofff/geology/cellmap.npy",
         help="Path to the cell maps",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        default="1",
+        help="Maximum number of processes to handle the report steps in parallel, 0 "
+        "to use all the cores available to the job ('1' by default).",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        default="1",
+        help="Number of simulations sharing the cores of the node, which divides the "
+        "available cores to set the processes ('1' by default).",
+    )
     if os.path.exists("NOMONOTONIC"):
         sys.exit()
     cmdargs = vars(parser.parse_known_args()[0])
     dig = {"where": "./"}
     dig["flowf"] = "."
     dig["maps"] = cmdargs["maps"]
+    # Cores available to this job (e.g., the allocation in a cluster node) shared
+    # with the simulations running at the same time, up to the given workers
+    cores = (
+        len(os.sched_getaffinity(0))
+        if hasattr(os, "sched_getaffinity")
+        else os.cpu_count() or 1
+    )
+    dig["workers"] = max(1, cores // int(cmdargs["jobs"]))
+    if int(cmdargs["workers"]) > 0:
+        dig["workers"] = min(dig["workers"], int(cmdargs["workers"]))
     dig["nxyz"] = np.genfromtxt(
         StringIO(cmdargs["resolution"]), delimiter=",", dtype=int
     )
@@ -66,7 +98,7 @@ def main():
     dig["dims"] = [2.8, 1.0, 1.2]
     dig["nocellsr"] = dig["nxyz"][0] * dig["nxyz"][2]
     dig["noxzr"] = dig["nxyz"][0] * dig["nxyz"][2]
-    dig["time_initial"], dig["times"] = 0, []
+    dig["time_initial"], dig["times"], dig["rst_initial"] = 0, [], 0
     read_opm(dig)
     sparse_data(dig)
     if isinstance(dig["dense_t"], float):
@@ -93,9 +125,9 @@ def sparse_data(dig):
             0, dig["times"][-1], round(dig["times"][-1] / dig["sparse_t"]) + 1
         )
     }
-    dil["fipnum"] = list(dig["init"]["FIPNUM"])
+    dil["fipnum"] = list(read_array(dig["init"], "FIPNUM"))
     for name in ["dx", "dy", "dz"]:
-        dil[f"{name}"] = np.array(dig["init"][name.upper()])
+        dil[f"{name}"] = read_array(dig["init"], name.upper())
     dil["names"] = [
         "pop1",
         "pop2",
@@ -146,11 +178,12 @@ def create_from_summary(dig, dil):
             if ind == 2:
                 break
     sort = sorted(range(len(i_jk)), key=i_jk.__getitem__)
-    pop1 = dig["unrst"]["PRESSURE", 0][dil["fipnum"].index(8)]
-    pop2 = dig["unrst"]["PRESSURE", 0][dil["fipnum"].index(9)]
-    if dig["unrst"].count("PCGW", 0):
-        pop1 -= dig["unrst"]["PCGW", 0][dil["fipnum"].index(8)]
-        pop2 -= dig["unrst"]["PCGW", 0][dil["fipnum"].index(9)]
+    sensors = [dil["fipnum"].index(8), dil["fipnum"].index(9)]
+    pop1, pop2 = read_array(dig["unrst"], "PRESSURE", 0, sensors)
+    if ("PCGW", 0) in dig["unrst"]:
+        pcgw = read_array(dig["unrst"], "PCGW", 0, sensors)
+        pop1 -= pcgw[0]
+        pop2 -= pcgw[1]
     dil["pop1"] = [pop1 * 1.0e5] + list(dig["smspec"][names[sort[0]]] * 1.0e5)  # Pa
     dil["pop2"] = [pop2 * 1.0e5] + list(dig["smspec"][names[sort[1]]] * 1.0e5)  # Pa
     for i in dil["fip_diss_a"]:
@@ -192,28 +225,120 @@ def compute_m_c(dig, dil):
         dil (dict): Modified local dictionary
 
     """
-    dil["boxc"] = np.array([fip in (4, 12, 17, 18) for fip in dil["fipnum"]])
-    dil["boxc_x"] = np.roll(dil["boxc"], 1)
-    dil["boxc_y"] = np.roll(dil["boxc"], -dig["gxyz"][0])
-    dil["boxc_z"] = np.roll(dil["boxc"], -dig["gxyz"][0] * dig["gxyz"][1])
-    for t_n in range(1, dig["norst"]):
-        rss = np.array(dig["unrst"]["RSW", t_n])
-        dil["xcw"] = np.divide(rss, rss + WAT_DEN_REF / GAS_DEN_REF)
-        rssat = np.array(dig["unrst"]["RSWSAT", t_n])
-        x_l_co2_max = np.divide(rssat, rssat + WAT_DEN_REF / GAS_DEN_REF)
-        dil["xcw"] = np.divide(dil["xcw"], x_l_co2_max)
-        dil["m_c"].append(
-            np.sum(
-                np.abs(
-                    (dil["xcw"][dil["boxc_x"]] - dil["xcw"][dil["boxc"]])
-                    * dil["dz"][dil["boxc"]]
-                )
-                + np.abs(
-                    (dil["xcw"][dil["boxc_z"]] - dil["xcw"][dil["boxc"]])
-                    * dil["dx"][dil["boxc"]]
-                )
-            )
-        )
+    dil["boxc"] = np.isin(dil["fipnum"], (4, 12, 17, 18))
+    # Cells in Box C and the neighbours selected by the rolled masks
+    ids = [
+        np.flatnonzero(dil["boxc"]),
+        np.flatnonzero(np.roll(dil["boxc"], 1)),
+        np.flatnonzero(np.roll(dil["boxc"], -dig["gxyz"][0] * dig["gxyz"][1])),
+    ]
+    cells, inverse = np.unique(np.concatenate(ids), return_inverse=True)
+    dil["ind_c"] = inverse[: ids[0].size]
+    dil["ind_x"] = inverse[ids[0].size : ids[0].size + ids[1].size]
+    dil["ind_z"] = inverse[ids[0].size + ids[1].size :]
+    dil["cells"] = cells
+    steps = np.arange(dig["rst_initial"] + 1, dig["norst"])
+    # Number of restart steps stacked at once to bound the memory
+    chunk = max(1, int(1e7 / max(cells.size, 1)))
+    chunk = max(1, min(chunk, -(-len(steps) // dig["workers"])))
+    for values in run_tasks(
+        dig,
+        dil,
+        m_c_steps,
+        [steps[i : i + chunk] for i in range(0, len(steps), chunk)],
+    ):
+        dil["m_c"] += values
+
+
+def m_c_steps(dig, dil, steps):
+    """
+    Total variation of the concentration within Box C for a group of restart steps
+
+    Args:
+        dig (dict): Global dictionary\n
+        dil (dict): Local dictionary\n
+        steps (array): Indices of the restart steps
+
+    Returns:
+        m_c (list): Total variation for each restart step
+
+    """
+    rss, rssat = (
+        np.array([read_array(dig["unrst"], name, t_n, dil["cells"]) for t_n in steps])
+        for name in ["RSW", "RSWSAT"]
+    )
+    xcw = np.divide(rss, rss + WAT_DEN_REF / GAS_DEN_REF)
+    xcw = np.divide(xcw, np.divide(rssat, rssat + WAT_DEN_REF / GAS_DEN_REF))
+    variation = np.abs(
+        (xcw[:, dil["ind_x"]] - xcw[:, dil["ind_c"]]) * dil["dz"][dil["boxc"]]
+    ) + np.abs((xcw[:, dil["ind_z"]] - xcw[:, dil["ind_c"]]) * dil["dx"][dil["boxc"]])
+    # Row by row to keep the same (pairwise) summation order of the values
+    return [np.sum(row) for row in variation]
+
+
+def run_tasks(dig, dil, function, tasks):
+    """
+    Evaluate the function for each task, in a pool of processes if more workers
+
+    Args:
+        dig (dict): Global dictionary\n
+        dil (dict): Local dictionary\n
+        function (callable): Function of dig, dil, and one task\n
+        tasks (list): Independent tasks (e.g., report steps)
+
+    Returns:
+        results (list): Results of the function in the same order as the tasks
+
+    """
+    if dig["workers"] < 2 or len(tasks) < 2:
+        return [function(dig, dil, task) for task in tasks]
+    # The array positions are shared, and only the memory maps are opened again in
+    # each process instead of being pickled
+    shared = {
+        key: value
+        for key, value in dig.items()
+        if key not in ["unrst", "init", "smspec"]
+    }
+    for name in ["unrst", "init"]:
+        shared[name] = {key: value for key, value in dig[name].items() if key != "map"}
+    with ProcessPoolExecutor(
+        max_workers=min(dig["workers"], len(tasks)),
+        initializer=start_worker,
+        initargs=(shared, dil, function),
+    ) as pool:
+        return list(pool.map(run_worker, tasks))
+
+
+def start_worker(dig, dil, function):
+    """
+    Set the dictionaries and function in a process of the pool
+
+    Args:
+        dig (dict): Global dictionary (with the array positions but not the maps)\n
+        dil (dict): Local dictionary\n
+        function (callable): Function of dig, dil, and one task
+
+    Returns:
+        None
+
+    """
+    for name, ext in [("unrst", "UNRST"), ("init", "INIT")]:
+        dig[name]["map"] = np.memmap(f"{dig['sim']}.{ext}", dtype=np.uint8, mode="r")
+    WORKER.update({"dig": dig, "dil": dil, "function": function})
+
+
+def run_worker(task):
+    """
+    Evaluate the function of the process for one task
+
+    Args:
+        task: Argument of the function (e.g., report step)
+
+    Returns:
+        result: Value returned by the function
+
+    """
+    return WORKER["function"](WORKER["dig"], WORKER["dil"], task)
 
 
 def write_sparse_data(dig, dil):
@@ -228,45 +353,53 @@ def write_sparse_data(dig, dil):
         None
 
     """
-    for name in dil["names"] + ["m_c"]:
-        if name == "m_c":
-            interp = interp1d(
-                dig["times"],
-                [0.0] + dil[f"{name}"],
-                fill_value="extrapolate",
-            )
-        elif "pop" in name:
-            interp = interp1d(
-                dig["times_summary"],
-                dil[f"{name}"],
-                fill_value="extrapolate",
-            )
-        else:
-            interp = interp1d(
-                dig["times_summary"],
-                [0.0] + list(dil[f"{name}"]),
-                fill_value="extrapolate",
-            )
-        dil[f"{name}"] = interp(dil["times_data"])
-    text = [
-        "# t [s], p1 [Pa], p2 [Pa], mobA [kg], immA [kg], dissA [kg], sealA [kg], "
-        + "<same for B>, MC [m^2], sealTot [kg]"
-    ]
-    for j, time in enumerate(dil["times_data"][1:]):
-        text.append(
-            f"{time:.3e},{dil['pop1'][j]:.5e},{dil['pop2'][j]:.5e},"
-            f"{dil['moba'][j]:.3e},{dil['imma'][j]:.3e},{dil['dissa'][j]:.3e},"
-            f"{dil['seala'][j]:.3e},{dil['mobb'][j]:.3e},{dil['immb'][j]:.3e},"
-            f"{dil['dissb'][j]:.3e},{dil['sealb'][j]:.3e},{dil['m_c'][j]:.3e},"
-            f"{dil['sealt'][j]:.3e}"
-        )
+    values = [dil["pop1"], dil["pop2"]]
+    values += [[0.0] + list(dil[name]) for name in dil["names"][2:]]
+    values = interpolate(dig["times_summary"], np.transpose(values), dil["times_data"])
+    m_c = interpolate(
+        dig["times"], np.transpose([[0.0] + dil["m_c"]]), dil["times_data"]
+    )
+    # Columns ordered as in the header (the values are shifted by one time)
+    table = np.column_stack(
+        (dil["times_data"][1:], values[:-1, :-1], m_c[:-1], values[:-1, -1])
+    )
+    text = StringIO()
+    np.savetxt(
+        text,
+        table,
+        fmt=["%.3e", "%.5e", "%.5e"] + ["%.3e"] * 10,
+        delimiter=",",
+        header="# t [s], p1 [Pa], p2 [Pa], mobA [kg], immA [kg], dissA [kg], "
+        + "sealA [kg], <same for B>, MC [m^2], sealTot [kg]",
+        comments="",
+    )
     with open("time_series.csv", "w", encoding="utf8") as file:
-        file.write("\n".join(text))
+        file.write(text.getvalue()[:-1])
+
+
+def interpolate(x, y, x_new):
+    """
+    Linear interpolation and extrapolation of the columns (as scipy's interp1d)
+
+    Args:
+        x (list): Times of the values\n
+        y (array): Values (one column per quantity)\n
+        x_new (array): Times to evaluate
+
+    Returns:
+        y_new (array): Interpolated values
+
+    """
+    ind = np.argsort(x, kind="mergesort")
+    x, y = np.asarray(x, dtype=float)[ind], np.asarray(y, dtype=float)[ind]
+    hi = np.searchsorted(x, x_new).clip(1, len(x) - 1)
+    slope = (y[hi] - y[hi - 1]) / (x[hi] - x[hi - 1])[:, None]
+    return slope * (x_new - x[hi - 1])[:, None] + y[hi - 1]
 
 
 def read_opm(dig):
     """
-    Read the simulation files using OPM
+    Index the restart and init files and read the summary using OPM
 
     Args:
         dig (dict): Global dictionary
@@ -275,36 +408,127 @@ def read_opm(dig):
         dig (dict): Modified global dictionary
 
     """
-    dig["unrst"] = OpmRestart(f"{dig['sim']}.UNRST")
-    time = []
-    for i in range(len(dig["unrst"].report_steps)):
-        time.append(float(f"{86400 * dig['unrst']['DOUBHEAD', i][0]:.0f}"))
-        if len(dig["times"]) == 0:
-            if max(dig["unrst"]["RSW", i]) > 0:
-                dig["time_initial"] = 86400 * dig["unrst"]["DOUBHEAD", i - 1][0]
-                dig["times"].append(0)
-                dig["times"].append(time[-1] - dig["time_initial"])
-        else:
-            dig["times"].append(time[-1] - dig["time_initial"])
-    dig["init"] = OpmFile(f"{dig['sim']}.INIT")
-    dig["egrid"] = OpmGrid(f"{dig['sim']}.EGRID")
+    dig["unrst"] = index_file(f"{dig['sim']}.UNRST")
+    dig["init"] = index_file(f"{dig['sim']}.INIT")
     dig["smspec"] = OpmSummary(f"{dig['sim']}.SMSPEC")
-    dig["norst"] = len(dig["unrst"].report_steps)
-    dig["porv"] = np.array(dig["init"]["PORV"])
-    dig["actind"] = list(i for i, porv in enumerate(dig["porv"]) if porv > 0)
-    dig["porva"] = np.array([porv for porv in dig["porv"] if porv > 0])
-    dig["nocellst"], dig["nocellsa"] = (
-        len(dig["porv"]),
-        dig["egrid"].active_cells,
-    )
+    dig["norst"] = sum(1 for key in dig["unrst"] if key[0] == "SEQNUM")
+    report_times(dig)
+    dig["porv"] = read_array(dig["init"], "PORV")
+    dig["actind"] = np.flatnonzero(dig["porv"] > 0)
+    dig["porva"] = dig["porv"][dig["actind"]]
+    intehead = read_array(dig["init"], "INTEHEAD")
+    dig["nocellst"], dig["nocellsa"] = len(dig["porv"]), int(intehead[11])
+    dig["gxyz"] = [int(intehead[8]), int(intehead[9]), int(intehead[10])]
+    dig["noxz"] = dig["gxyz"][0] * dig["gxyz"][2]
+
+
+def report_times(dig):
+    """
+    Times of the summary and of the restart steps after the start of the injection
+
+    Args:
+        dig (dict): Global dictionary
+
+    Returns:
+        dig (dict): Modified global dictionary
+
+    """
     dig["times_summary"] = [0.0]
     dig["times_summary"] += list(86400.0 * dig["smspec"]["TIME"])
-    dig["gxyz"] = [
-        dig["egrid"].dimension[0],
-        dig["egrid"].dimension[1],
-        dig["egrid"].dimension[2],
+    time = [
+        86400 * read_array(dig["unrst"], "DOUBHEAD", i)[0] for i in range(dig["norst"])
     ]
-    dig["noxz"] = dig["egrid"].dimension[0] * dig["egrid"].dimension[2]
+    # The co2 is injected with SOURCE (no wells, then no injection rates in the
+    # summary), so the injection starts after the last step without dissolved co2
+    start = next(
+        (
+            i
+            for i in range(1, dig["norst"])
+            if read_array(dig["unrst"], "RSW", i).max() > 0
+        ),
+        0,
+    )
+    if not start:
+        raise ValueError(
+            f"No dissolved CO2 in the restart steps of {dig['sim']}.UNRST, then the "
+            + "start of the injection was not found"
+        )
+    dig["time_initial"], dig["rst_initial"] = time[start - 1], start - 1
+    dig["times"] = [0]
+    for value in time[start:]:
+        dig["times"].append(float(f"{value:.0f}") - dig["time_initial"])
+
+
+def index_file(name):
+    """
+    Locate the arrays in an unformatted OPM output file to read them on demand
+
+    Args:
+        name (str): Path to the file
+
+    Returns:
+        ecl (dict): Memory map of the file and position of each (keyword, occurrence)
+
+    """
+    ecl, occurrences = {"map": np.memmap(name, dtype=np.uint8, mode="r")}, {}
+    pos, size = 0, os.path.getsize(name)
+    with open(name, "rb") as file:
+        while pos < size:
+            file.seek(pos + 4)
+            header = file.read(16)
+            keyword = header[:8].decode().strip()
+            count = int.from_bytes(header[8:12], "big", signed=True)
+            kind = header[12:16].decode()
+            if kind[:2] == "C0":
+                dtype, block = f"S{int(kind[1:])}", 105
+            else:
+                dtype, block = ECL_TYPES[kind]
+            occurrences[keyword] = occurrences.get(keyword, -1) + 1
+            pos += 24
+            ecl[keyword, occurrences[keyword]] = (pos + 4, count, dtype, block)
+            # Each record of data is enclosed by two 4-byte markers
+            pos += count * np.dtype(dtype).itemsize + 8 * (-(-count // block))
+    return ecl
+
+
+def read_array(ecl, keyword, occurrence=0, cells=None):
+    """
+    Values of an array from the memory map, only the given cells if provided
+
+    Args:
+        ecl (dict): Memory map and array positions from index_file\n
+        keyword (str): Name of the array\n
+        occurrence (int): Number of the array in the file (e.g., report step)\n
+        cells (array): Indices of the values to read
+
+    Returns:
+        values (array): Values of the array
+
+    """
+    pos, count, dtype, block = ecl[keyword, occurrence]
+    itemsize = np.dtype(dtype).itemsize
+    nfull, rest = divmod(count, block)
+    # Views of the complete records and the last one, skipping the markers
+    full, tail = np.empty((0, block), dtype), np.empty(0, dtype)
+    if nfull:
+        full = np.ndarray(
+            (nfull, block), dtype, ecl["map"], pos, (block * itemsize + 8, itemsize)
+        )
+    if rest:
+        tail = np.ndarray(
+            (rest,), dtype, ecl["map"], pos + nfull * (block * itemsize + 8)
+        )
+    native = np.dtype(dtype).newbyteorder("=")
+    if cells is None:
+        if nfull == 0 or (nfull == 1 and rest == 0):
+            return (tail if nfull == 0 else full[0]).astype(native, copy=False)
+        return np.concatenate((full.ravel(), tail)).astype(native, copy=False)
+    record, ind = np.divmod(np.asarray(cells), block)
+    values = np.empty(record.size, dtype=native)
+    last = record == nfull
+    values[~last] = full[record[~last], ind[~last]]
+    values[last] = tail[ind[last]]
+    return values
 
 
 def dense_data(dig):
@@ -320,46 +544,67 @@ def dense_data(dig):
     """
     dil = {"rstno": []}
     for time in dig["dense_t"]:
-        dil["rstno"].append(dig["times"].index(time))
+        # Closest written restart step (the deck might skip intermediate steps)
+        index = np.abs(np.array(dig["times"]) - time).argmin()
+        # The restart times are rounded to seconds
+        if abs(dig["times"][index] - time) > 1.0:
+            raise ValueError(
+                f"No restart step at {time} s after the start of the injection "
+                + f"(the closest one is at {dig['times'][index]} s)"
+            )
+        dil["rstno"].append(dig["rst_initial"] + int(index))
     dil["nrstno"] = len(dil["rstno"])
     for i, j, k in zip(["x", "y", "z"], dig["dims"], dig["nxyz"]):
         dil[f"ref{i}vert"] = np.linspace(0, j, k + 1)
         dil[f"ref{i}cent"] = 0.5 * (dil[f"ref{i}vert"][1:] + dil[f"ref{i}vert"][:-1])
-    dil["refxgrid"] = np.zeros(dig["nxyz"][0] * dig["nxyz"][2])
-    dil["refzgrid"] = np.zeros(dig["nxyz"][0] * dig["nxyz"][2])
-    dil["refpoly"] = []
-    dil["cell_cent"] = np.load(dig["maps"])
-    dig["actindr"] = []
-    names = ["sgas", "cco2"]
-    for i, t_n in enumerate(dil["rstno"]):
-        generate_arrays(dig, dil, names, t_n)
-        map_to_report_grid(dil, names)
-        if dig["dense_t"][i] % 3600 == 0:
-            write_dense_data(dig, dil, int(dig["dense_t"][i] / 3600))
-        else:
-            write_dense_data(dig, dil, int(dig["dense_t"][i]) / 3600)
-
-
-def generate_arrays(dig, dil, names, t_n):
+    dil["cell_cent"] = np.load(dig["maps"]).astype(int)
+    # Coordinates and values of the reporting cells as written in the csv files
+    dil["table"] = np.zeros((dig["nocellsr"], 4))
+    dil["table"][:, 0] = np.tile(dil["refxcent"], dig["nxyz"][2])
+    dil["table"][:, 1] = np.repeat(dil["refzcent"], dig["nxyz"][0])
+    for name in ["sgas", "cco2"]:
+        dil[f"{name}_array"] = np.zeros(dig["nocellst"], dtype=float)
+    run_tasks(dig, dil, dense_step, list(zip(dil["rstno"], dig["dense_t"])))
+
+
+def dense_step(dig, dil, task):
+    """
+    Write the spatial map for one report step
+
+    Args:
+        dig (dict): Global dictionary\n
+        dil (dict): Local dictionary\n
+        task (tuple): Index of the restart step and time [s]
+
+    Returns:
+        None
+
+    """
+    t_n, time = task
+    generate_arrays(dig, dil, t_n)
+    map_to_report_grid(dil, ["sgas", "cco2"])
+    if time % 3600 == 0:
+        write_dense_data(dig, dil, int(time / 3600))
+    else:
+        write_dense_data(dig, dil, int(time) / 3600)
+
+
+def generate_arrays(dig, dil, t_n):
     """
     Arrays for the dense data
 
     Args:
         dig (dict): Global dictionary\n
         dil (dict): Local dictionary\n
-        names (list): Strings with the quantities for the spatial maps\n
         t_n (int): Index for the number of restart file
 
     Returns:
         dil (dict): Modified local dictionary
 
     """
-    for name in names:
-        dil[f"{name}_array"] = np.zeros(dig["nocellst"], dtype=float)
-        dil[f"{name}_refg"] = np.zeros(dig["nocellsr"], dtype=float)
-    sgas = abs(np.array(dig["unrst"]["SGAS", t_n]))
-    rhow = np.array(dig["unrst"]["WAT_DEN", t_n])
-    rsw = np.array(dig["unrst"]["RSW", t_n])
+    sgas = abs(read_array(dig["unrst"], "SGAS", t_n))
+    rhow = read_array(dig["unrst"], "WAT_DEN", t_n)
+    rsw = read_array(dig["unrst"], "RSW", t_n)
     xlco2 = np.divide(rsw, rsw + WAT_DEN_REF / GAS_DEN_REF)
     dil["sgas_array"][dig["actind"]] = sgas
     dil["cco2_array"][dig["actind"]] = xlco2 * rhow
@@ -377,9 +622,8 @@ def map_to_report_grid(dil, names):
         dil (dict): Modified local dictionary
 
     """
-    for i, ind in enumerate(dil["cell_cent"]):
-        for name in names:
-            dil[f"{name}_refg"][i] = dil[f"{name}_array"][int(ind)]
+    for name in names:
+        dil[f"{name}_refg"] = dil[f"{name}_array"][dil["cell_cent"]]
 
 
 def write_dense_data(dig, dil, n):
@@ -395,17 +639,19 @@ def write_dense_data(dig, dil, n):
         None
 
     """
-    text = ["x,z,saturation,concentration"]
-    for k, zcord in enumerate(dil["refzcent"]):
-        for i, xcord in enumerate(dil["refxcent"]):
-            idc = -dig["nxyz"][0] * (dig["nxyz"][2] - k) + i
-            text.append(
-                f"{xcord:.3f}, {zcord:.3f}, "
-                + f"{dil['sgas_refg'][idc]:.3f}, "
-                + f"{dil['cco2_refg'][idc]:.3f}"
-            )
+    dil["table"][:, 2] = dil["sgas_refg"]
+    dil["table"][:, 3] = dil["cco2_refg"]
+    text = StringIO()
+    np.savetxt(
+        text,
+        dil["table"],
+        fmt="%.3f",
+        delimiter=", ",
+        header="x,z,saturation,concentration",
+        comments="",
+    )
     with open(f"{dig['where']}/spatial_map_{n}h.csv", "w", encoding="utf8") as file:
-        file.write("\n".join(text))
+        file.write(text.getvalue()[:-1])
 
 
 if __name__ == "__main__":
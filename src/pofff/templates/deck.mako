@@ -30,17 +30,26 @@ GRID
 INIT
 
 % if dic["grid"] == 'corner-point':
+% if dic["binary"]:
+IMPORT
+'${dic['deck']}/GRID.IMPORT' /
+% else:
 INCLUDE
 '${dic['deck']}/GRID.INC' /
+% endif
 % elif dic["grid"] == 'tensor':
+% if not dic["binary"]:
 INCLUDE
 '${dic['deck']}/DX.INC' /
+% endif
 
 DY 
 ${dic['noCells'][0]*dic['noCells'][1]*dic['noCells'][2]}*${dic['ymy'][1]} /
+% if not dic["binary"]:
 
 INCLUDE
 DZ.INC /
+% endif
 
 TOPS
 ${dic['noCells'][0]}*0 /
@@ -58,8 +67,13 @@ TOPS
 ${dic['noCells'][0]}*0 /
 % endif
 
+% if dic["binary"]:
+IMPORT
+'${dic['deck']}/PROPERTIES.IMPORT' /
+% else:
 INCLUDE
 '${dic['deck']}/FLUXNUM.INC' /
+% endif
 
 DISPERC
 ${dic['noCells'][0]*dic['noCells'][1]*dic['noCells'][2]}*0 /
@@ -70,7 +84,7 @@ EQUALREG.INC /
 BCCON 
 1 1 ${dic['noCells'][0]} 1 1 1 1 Z- /
 /
-% if "multpv" in dic:
+% if "multpv" in dic and not dic["binary"]:
 INCLUDE
 '${dic['deck']}/MULTPV.INC' /
 INCLUDE
@@ -112,8 +126,13 @@ COPY
 FLUXNUM SATNUM /
 /
 
+% if dic["binary"]:
+IMPORT
+'${dic['deck']}/FIPNUM.IMPORT' /
+% else:
 INCLUDE
 '${dic['deck']}/FIPNUM.INC' /
+% endif
 ----------------------------------------------------------------------------
 SOLUTION
 ----------------------------------------------------------------------------
@@ -173,6 +192,12 @@ SOURCE
 ${dic['wellijk'][i][0]} ${dic['wellijk'][i][1]} ${dic['wellijk'][i][2]} GAS ${f"{dic['inj'][j][2+i] * 86400:E}"} /
 % endfor
 /
+% for nstep, write, switch in dic["restarts"][j]:
+% if switch:
+RPTRST
+${"BASIC=2 DEN PCGW RESIDUAL RSWSAT" if write else "BASIC=0"} /
+% endif
 TSTEP
-${f"{round(dic['inj'][j][0]/dic['inj'][j][1])}*" if round(dic['inj'][j][0]/dic['inj'][j][1]) > 1 else ""}${dic['inj'][j][1] / 86400.} /
+${f"{nstep}*" if nstep > 1 else ""}${dic['inj'][j][1] / 86400.} /
+% endfor
 % endfor
\ No newline at end of file
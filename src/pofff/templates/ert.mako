@@ -24,9 +24,9 @@ INSTALL_JOB ${name} ./jobs/${name.upper()}
 SIMULATION_JOB ${name}
 % endfor
 INSTALL_JOB data ./jobs/DATA
-SIMULATION_JOB data -t ${dic["times"]} -m ${dic['deck']}/cellmap.npy
+SIMULATION_JOB data -t ${dic["times"]} -m ${dic['deck']}/cellmap.npy -w ${dic["workers"]} -j ${dic["nsim"]}
 INSTALL_JOB metric ./jobs/METRIC
-SIMULATION_JOB metric -t ${dic["times"]} -e ${dic["experiment"]} -s ${dic["msat"]} -c ${dic["mcon"]} -p ${dic["path"]}
+SIMULATION_JOB metric -t ${dic["times"]} -e ${dic["runs"]} -s ${dic["msat"]} -c ${dic["mcon"]} -p ${dic["path"]} -b ${dic["emd_backend"]} -w ${dic["workers"]} -j ${dic["nsim"]}${f' -d {dic["cache"]}' if dic["cache_size"] > 0 else ""}${f' -m {dic["server"]}' if dic["server"] else ""}${" -i 1" if dic["emd_integrated"] else ""}${f' -l {dic["emd_levels"]} -x {dic["emd_tolerance"]}' if dic["emd_backend"] == "pyramid" else ""}${f' -a {dic["emd_approximation"]} -r {dic["emd_regularization"]} -n {dic["emd_projections"]} -g {dic["emd_margin"]} -k {dic["emd_calibration"]} -o {dic["fol"]}' if dic["emd_approximation"] != "none" else ""}
 % if dic["delete"]:
 INSTALL_JOB delete ./jobs/DELETE
 SIMULATION_JOB delete
@@ -55,11 +55,37 @@ forward_model:
   - flow
   - data        -t ${dic["times"]}
                 -m ${dic['deck']}/cellmap.npy
+                -w ${dic["workers"]}
+                -j ${dic["nsim"]}
   - metric      -t ${dic["times"]}
-                -e ${dic["experiment"]}
+                -e ${dic["runs"]}
                 -p ${dic["path"]}
                 -s ${dic["msat"]}
                 -c ${dic["mcon"]}
+                -b ${dic["emd_backend"]}
+                -w ${dic["workers"]}
+                -j ${dic["nsim"]}
+% if dic["cache_size"] > 0:
+                -d ${dic["cache"]}
+% endif
+% if dic["server"]:
+                -m ${dic["server"]}
+% endif
+% if dic["emd_integrated"]:
+                -i 1
+% endif
+% if dic["emd_backend"] == "pyramid":
+                -l ${dic["emd_levels"]}
+                -x ${dic["emd_tolerance"]}
+% endif
+% if dic["emd_approximation"] != "none":
+                -a ${dic["emd_approximation"]}
+                -r ${dic["emd_regularization"]}
+                -n ${dic["emd_projections"]}
+                -g ${dic["emd_margin"]}
+                -k ${dic["emd_calibration"]}
+                -o ${dic["fol"]}
+% endif
 % if dic["delete"]:
   - delete
 % endif
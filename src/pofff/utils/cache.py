@@ -0,0 +1,132 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""
+Utiliy functions to reuse the grid and geological positions between runs.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+from pofff.utils.writefile import create_corner_point_grid
+
+# Values computed in grid() and positions() that are needed to write the deck
+CACHED = [
+    "noCells",
+    "xmx",
+    "ymy",
+    "zmz",
+    "dsize",
+    "xcoord",
+    "zcoord",
+    "fluxnum",
+    "fipnum",
+    "multpv",
+    "sensorijk",
+    "wellijk",
+    "cellmap",
+]
+LISTS = ["noCells", "dsize", "sensorijk", "wellijk"]
+
+
+def cache_key(dic):
+    """
+    Hash of the grid configuration, geological files, and pofff grid routines
+
+    Args:
+        dic (dict): Global dictionary
+
+    Returns:
+        key (str): Name of the cache entry
+
+    """
+    config = {
+        name: dic.get(name)
+        for name in ["grid", "x", "y", "z", "thickness", "mult_thickness", "sources"]
+    }
+    config["dims"] = [float(value) for value in dic["dims"]]
+    sha = hashlib.sha256(json.dumps(config, sort_keys=True).encode())
+    for name in [
+        "geology/points.geo",
+        "geology/lines.geo",
+        "geology/polygons.geo",
+        "geology/horizonts.geo",
+        "geology/final_thickness.npy",
+        "geology/initial_thickness.csv",
+        "geology/cellmap.npy",
+        "utils/inputvalues.py",
+        "utils/mapproperties.py",
+        "utils/writefile.py",
+        "utils/cache.py",
+    ]:
+        if os.path.isfile(f"{dic['path']}/{name}"):
+            with open(f"{dic['path']}/{name}", "rb") as file:
+                sha.update(file.read())
+    return sha.hexdigest()
+
+
+def load_cache(dic):
+    """
+    Restore the grid and positions if a previous run used the same configuration
+
+    Args:
+        dic (dict): Global dictionary
+
+    Returns:
+        found (bool): True if the values were read from the cache
+
+    """
+    if dic["cache_size"] <= 0:
+        return False
+    dic["cache_file"] = f"{os.path.expanduser(dic['cache'])}/grid_{cache_key(dic)}.npz"
+    if not os.path.isfile(dic["cache_file"]):
+        return False
+    try:
+        with np.load(dic["cache_file"]) as data:
+            for name in data.files:
+                dic[name] = data[name].tolist() if name in LISTS else data[name]
+    except (OSError, ValueError, EOFError):
+        return False
+    os.utime(dic["cache_file"])
+    if dic["grid"] == "corner-point":
+        create_corner_point_grid(dic, dic["xcoord"], dic["zcoord"])
+    if "cellmap" in dic:
+        np.save(f"{dic['deck']}/cellmap", dic["cellmap"])
+    else:
+        os.system(f"cp {dic['path']}/geology/cellmap.npy {dic['deck']}/")
+    return True
+
+
+def save_cache(dic):
+    """
+    Store the grid and positions and evict the least recently used entries
+
+    Args:
+        dic (dict): Global dictionary
+
+    Returns:
+        None
+
+    """
+    if dic["cache_size"] <= 0:
+        return
+    folder = os.path.dirname(dic["cache_file"])
+    os.makedirs(folder, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=folder, suffix=".tmp", delete=False) as file:
+        np.savez_compressed(
+            file, **{name: np.asarray(dic[name]) for name in CACHED if name in dic}
+        )
+    os.replace(file.name, dic["cache_file"])
+    entries = sorted(
+        (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+        for entry in os.scandir(folder)
+        if entry.name.startswith("grid_") and entry.name.endswith(".npz")
+    )
+    size = sum(entry[1] for entry in entries)
+    for _, nbytes, path in entries[:-1]:
+        if size <= dic["cache_size"] * 1e6:
+            break
+        os.remove(path)
+        size -= nbytes
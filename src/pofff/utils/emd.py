@@ -0,0 +1,540 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""
+Utiliy functions to compute the Wasserstein distance between segmented maps.
+"""
+
+import os
+import sys
+import time
+import hashlib
+import resource
+import tempfile
+import numpy as np
+import ot
+from PIL import Image
+from scipy import sparse
+from scipy.optimize import linprog
+
+# Size of the images to compute the distance (the segmented maps are 280x120)
+SIZE = (140, 60)
+# Sizes of the images for the multiresolution distance (each level halves the cells)
+PYRAMID = ((35, 15), (70, 30), (140, 60), (280, 120))
+# Size of the segmented maps, used by the 'grid' backend (memory linear in the cells)
+NATIVE = PYRAMID[-1]
+
+
+def segmented_emd(segmentation_1, segmentation_2, backend="pot"):
+    """
+    Wasserstein distance between two segmented maps without writing images
+
+    Args:
+        segmentation_1 (array): First segmented map (0 water, 1 dissolved, 2 gas)\n
+        segmentation_2 (array): Second segmented map\n
+        backend (str): Name of the method in BACKENDS
+
+    Returns:
+        distance (float): Wasserstein distance in normalized mass times meter
+
+    """
+    size = backend_size(backend)
+    return wasserstein(
+        distribution(segmentation_1, size), distribution(segmentation_2, size), backend
+    )
+
+
+def backend_size(backend, levels=3):
+    """
+    Size of the images to compute the distance with a backend
+
+    Args:
+        backend (str): Name of the method in BACKENDS\n
+        levels (int): Number of images for the 'pyramid' backend
+
+    Returns:
+        size (tuple): Number of cells in x and z
+
+    """
+    if backend == "pyramid":
+        return PYRAMID[levels - 1]
+    if backend == "grid":
+        return NATIVE
+    return SIZE
+
+
+def grid_emd(distribution_1, distribution_2, dims=(2.8, 1.2)):
+    """
+    Exact Wasserstein distance with L1 ground cost as a min-cost flow on the grid
+
+    The mass only moves between neighbouring cells, which gives the same distance as
+    the dense L1 cost matrix using a number of arcs proportional to the cells.
+
+    Args:
+        distribution_1 (array): First distribution (flattened as in distribution())\n
+        distribution_2 (array): Second distribution\n
+        dims (tuple): Length and height of the domain [m]
+
+    Returns:
+        distance (float): Wasserstein distance in normalized mass times meter
+
+    """
+    size = image_size(distribution_1)
+    n_x, n_z = size
+    supply = np.asarray(distribution_1, dtype=float) - distribution_2
+    scale = np.abs(supply).max()
+    if scale == 0:
+        return 0.0
+    ids = np.arange(n_x * n_z).reshape(size, order="F")
+    # Arcs in both directions between the neighbours in x and then in z
+    tails = np.concatenate(
+        (ids[:-1].ravel(), ids[1:].ravel(), ids[:, :-1].ravel(), ids[:, 1:].ravel())
+    )
+    heads = np.concatenate(
+        (ids[1:].ravel(), ids[:-1].ravel(), ids[:, 1:].ravel(), ids[:, :-1].ravel())
+    )
+    cost = np.repeat(
+        [dims[0] / n_x, dims[1] / n_z], [2 * (n_x - 1) * n_z, 2 * n_x * (n_z - 1)]
+    )
+    arcs = np.arange(tails.size)
+    # Net outflow of each cell (the balance of the last cell follows from the rest)
+    balance = sparse.csr_matrix(
+        (
+            np.repeat([1.0, -1.0], tails.size),
+            (np.concatenate((tails, heads)), np.concatenate((arcs, arcs))),
+        ),
+        shape=(n_x * n_z, tails.size),
+    )[:-1]
+    result = linprog(
+        cost,
+        A_eq=balance,
+        b_eq=supply[:-1] / scale,
+        bounds=(0, None),
+        method="highs-ipm",
+    )
+    if not result.success:
+        raise ValueError(f"Invalid result: {result.message}")
+    return result.fun * scale
+
+
+def wasserstein(distribution_1, distribution_2, backend="pot", **options):
+    """
+    Wasserstein distance between two distributions on the resized images
+
+    Args:
+        distribution_1 (array): First distribution from distribution()\n
+        distribution_2 (array): Second distribution\n
+        backend (str): Name of the method in BACKENDS\n
+        options: Parameters of the approximations (e.g., reg for sinkhorn)
+
+    Returns:
+        distance (float): Wasserstein distance in normalized mass times meter
+
+    """
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Invalid EMD backend: {backend}, valid options are {', '.join(BACKENDS)}"
+        )
+    start = time.time()
+    distance = BACKENDS[backend](distribution_1, distribution_2, **options)
+    print(
+        f"EMD ({backend}): {time.time() - start:.2f} s, "
+        + f"process peak memory {peak_memory():.0f} MB"
+    )
+    return distance
+
+
+def pot_emd(distribution_1, distribution_2):
+    """
+    Exact Wasserstein distance with Euclidean ground cost using POT
+
+    Args:
+        distribution_1 (array): First distribution from distribution()\n
+        distribution_2 (array): Second distribution
+
+    Returns:
+        distance (float): Wasserstein distance in normalized mass times meter
+
+    """
+    # NOTE: ot has severe memory restrictions and computing the exact EMD has
+    # O(n**3) complexity, then the images are resized to a coarser resolution.
+    return ot.emd2(*support(distribution_1, distribution_2), numItermax=500000)
+
+
+def pot_threads_emd(distribution_1, distribution_2):
+    """
+    Exact Wasserstein distance with Euclidean ground cost using POT with all cores
+
+    Args:
+        distribution_1 (array): First distribution from distribution()\n
+        distribution_2 (array): Second distribution
+
+    Returns:
+        distance (float): Wasserstein distance in normalized mass times meter
+
+    """
+    return ot.emd2(
+        *support(distribution_1, distribution_2),
+        numItermax=500000,
+        numThreads="max",
+    )
+
+
+def sinkhorn_emd(distribution_1, distribution_2, reg=1e-2):
+    """
+    Entropic approximation (above the exact value) of the Wasserstein distance
+
+    Args:
+        distribution_1 (array): First distribution from distribution()\n
+        distribution_2 (array): Second distribution\n
+        reg (float): Regularization relative to the largest distance
+
+    Returns:
+        distance (float): Transport cost of the regularized plan
+
+    """
+    values_1, values_2, cost = support(distribution_1, distribution_2)
+    scale = cost.max() if cost.size else 1.0
+    return float(ot.sinkhorn2(values_1, values_2, cost / scale, reg)) * scale
+
+
+def sliced_emd(distribution_1, distribution_2, projections=100):
+    """
+    Sliced approximation (below the exact value) of the Wasserstein distance
+
+    Args:
+        distribution_1 (array): First distribution from distribution()\n
+        distribution_2 (array): Second distribution\n
+        projections (int): Number of directions to project the distributions
+
+    Returns:
+        distance (float): Mean of the one-dimensional distances
+
+    """
+    centers = cell_centers(image_size(distribution_1))
+    cells_1 = np.flatnonzero(distribution_1)
+    cells_2 = np.flatnonzero(distribution_2)
+    return float(
+        ot.sliced_wasserstein_distance(
+            centers[cells_1],
+            centers[cells_2],
+            distribution_1[cells_1],
+            distribution_2[cells_2],
+            n_projections=projections,
+            p=1,
+            seed=0,
+        )
+    )
+
+
+def pyramid_emd(distribution_1, distribution_2, tolerance=5e-2):
+    """
+    Exact Wasserstein distance from the coarsest image until two levels agree
+
+    Args:
+        distribution_1 (array): First distribution on one of the PYRAMID sizes\n
+        distribution_2 (array): Second distribution\n
+        tolerance (float): Relative difference between consecutive levels to stop
+
+    Returns:
+        distance (float): Wasserstein distance on the last solved level
+
+    """
+    return pyramid_distances([(distribution_1, distribution_2)], tolerance)[0]
+
+
+def pyramid_distances(pairs, tolerance=5e-2, mapper=map):
+    """
+    Exact Wasserstein distances of several pairs on the same pyramid level
+
+    The distributions are summed in blocks of 2x2 cells down to 35x15, and the
+    distances are computed from the coarsest level, stopping once the relative
+    change to the previous level is below the tolerance for all the pairs (the
+    finer levels, which cost most of the time, are only solved if the coarse ones
+    do not agree). Then all the distances come from the same image size.
+
+    Args:
+        pairs (list): Distributions on the same PYRAMID size\n
+        tolerance (float): Relative difference between consecutive levels to stop\n
+        mapper (callable): Map over the pairs of each level (e.g., of a thread pool)
+
+    Returns:
+        distances (list): Wasserstein distances on the last solved level
+
+    """
+    levels = [pyramid_levels(*pair) for pair in pairs]
+    if len({len(level) for level in levels}) > 1:
+        raise ValueError("The distributions of the pyramid have different sizes")
+    distances = [np.inf] * len(pairs)
+    for i in range(len(levels[0]) - 1, -1, -1):
+        previous = distances
+        distances = list(
+            mapper(
+                pot_emd,
+                [level[i][1] for level in levels],
+                [level[i][2] for level in levels],
+            )
+        )
+        changing = sum(
+            abs(distance - value) > tolerance * distance
+            for distance, value in zip(distances, previous)
+        )
+        size = levels[0][i][0]
+        print(
+            f"EMD (pyramid) on {size[0]}x{size[1]}: {changing} of {len(pairs)} "
+            + "distances above the tolerance"
+        )
+        if changing == 0:
+            break
+    return distances
+
+
+def pyramid_levels(distribution_1, distribution_2):
+    """
+    Distributions summed in blocks of 2x2 cells down to the first PYRAMID size
+
+    Args:
+        distribution_1 (array): First distribution on one of the PYRAMID sizes\n
+        distribution_2 (array): Second distribution
+
+    Returns:
+        levels (list): Size and distributions of each level (the finest first)
+
+    """
+    size = image_size(distribution_1)
+    if (
+        size not in PYRAMID
+        or size[0] * size[1] != distribution_1.size
+        or distribution_1.size != distribution_2.size
+    ):
+        raise ValueError(
+            f"Invalid size of the distributions for the pyramid: {distribution_1.size}"
+            + f" and {distribution_2.size} values, valid sizes are "
+            + ", ".join(f"{n_x}x{n_z}" for n_x, n_z in PYRAMID)
+        )
+    levels = [(size, distribution_1, distribution_2)]
+    while levels[-1][0] != PYRAMID[0]:
+        size, values_1, values_2 = levels[-1]
+        levels.append(
+            (
+                (size[0] // 2, size[1] // 2),
+                pool(values_1, size),
+                pool(values_2, size),
+            )
+        )
+    return levels
+
+
+def support(distribution_1, distribution_2):
+    """
+    Distributions restricted to the cells with mass and the cost between them
+
+    The cells without mass do not change the optimal transport, while the size of
+    the cost matrix and transport plan drops from 8400x8400 to the supports (then
+    the cost is computed for each pair of distributions instead of being stored).
+
+    Args:
+        distribution_1 (array): First distribution from distribution()\n
+        distribution_2 (array): Second distribution
+
+    Returns:
+        values_1 (array): Nonzero values of the first distribution\n
+        values_2 (array): Nonzero values of the second distribution\n
+        cost (array): Euclidean distances between the cells with mass
+
+    """
+    centers = cell_centers(image_size(distribution_1))
+    cells_1 = np.flatnonzero(distribution_1)
+    cells_2 = np.flatnonzero(distribution_2)
+    cost = ot.dist(centers[cells_1], centers[cells_2], metric="euclidean")
+    return distribution_1[cells_1], distribution_2[cells_2], cost
+
+
+def cv2_emd(distribution_1, distribution_2):
+    """
+    Exact Wasserstein distance with Euclidean ground cost using OpenCV
+
+    Only the cells with mass are given as signatures, then the cost matrix is not
+    needed (the computations are in single precision).
+
+    Args:
+        distribution_1 (array): First distribution from distribution()\n
+        distribution_2 (array): Second distribution
+
+    Returns:
+        distance (float): Wasserstein distance in normalized mass times meter
+
+    """
+    import cv2  # pylint: disable=C0415
+
+    centers = cell_centers(image_size(distribution_1))
+    signatures = []
+    for values in [distribution_1, distribution_2]:
+        mass = np.flatnonzero(values)
+        signatures.append(
+            np.column_stack((values[mass], centers[mass])).astype(np.float32)
+        )
+    return float(cv2.EMD(signatures[0], signatures[1], cv2.DIST_L2)[0])
+
+
+def peak_memory():
+    """
+    Maximum resident set size of the process
+
+    This is the peak since the process started, i.e., of all the previous and
+    concurrent evaluations, not only of the last one.
+
+    Returns:
+        memory (float): Peak memory in MB
+
+    """
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # In bytes on macOS and in kilobytes on Linux
+    return maxrss / 1024**2 if sys.platform == "darwin" else maxrss / 1024
+
+
+def experiment_distribution(file_name, cache="", size=SIZE):
+    """
+    Distribution of an experimental segmentation, stored in the cache folder
+
+    Args:
+        file_name (str): Path to the csv file with the segmentation\n
+        cache (str): Folder to reuse the distribution between processes\n
+        size (tuple): Number of cells in x and z of the resized image
+
+    Returns:
+        values (array): Flattened distribution summing up to 1
+
+    """
+    if cache:
+        with open(file_name, "rb") as file:
+            key = hashlib.sha256(file.read() + str(size).encode()).hexdigest()
+        name = f"{os.path.expanduser(cache)}/emd_exp_{key}.npy"
+        if os.path.isfile(name):
+            return np.load(name)
+    # Skip the first 30 rows as they are not contained in the modeling results
+    values = distribution(
+        np.loadtxt(file_name, dtype="int", delimiter=",")[30:, :], size
+    )
+    if cache:
+        save_array(name, values)
+    return values
+
+
+def distribution(segmentation, size=SIZE):
+    """
+    Normalized intensities of the resized grayscale image of a segmented map
+
+    Args:
+        segmentation (array): Segmented map (0 water, 1 dissolved, 2 gas)\n
+        size (tuple): Number of cells in x and z of the resized image
+
+    Returns:
+        values (array): Flattened distribution summing up to 1
+
+    """
+    image = segment_image(segmentation).resize(size, Image.Resampling.LANCZOS)
+    # Same ordering of the values as in the fluidflower scripts (image data in
+    # rows reshaped with the image size)
+    values = np.asarray(image, dtype=int).reshape(size)
+    values = values / np.sum(values)
+    return values.flatten(order="F")
+
+
+def segment_image(segmentation):
+    """
+    Grayscale image of a segmented map
+
+    Args:
+        segmentation (array): Segmented map (0 water, 1 dissolved, 2 gas)
+
+    Returns:
+        image (Image): Image with intensities of 0, 128, and 255
+
+    """
+    values = np.zeros(segmentation.shape, dtype=np.uint8)
+    values[segmentation == 1] = 128
+    values[segmentation == 2] = 255
+    return Image.fromarray(values, mode="L")
+
+
+def cell_centers(size=SIZE):
+    """
+    Coordinates of the cell centers of the resized images
+
+    Args:
+        size (tuple): Number of cells in x and z of the resized image
+
+    Returns:
+        centers (array): x and z coordinates of each cell (ordered as the values)
+
+    """
+    n_x, n_z = size
+    cc_x, cc_y = np.meshgrid(np.arange(n_x), np.arange(n_z), indexing="ij")
+    cc_x_flat = cc_x.flatten("F") / n_x * 2.8 + 5e-3 * 280 / n_x
+    cc_y_flat = cc_y.flatten("F") / n_z * 1.2 + 5e-3 * 120 / n_z
+    return np.vstack((cc_x_flat, cc_y_flat)).T
+
+
+def image_size(values):
+    """
+    Number of cells in x and z of a flattened distribution
+
+    Args:
+        values (array): Distribution on an image with the aspect ratio of SIZE
+
+    Returns:
+        size (tuple): Number of cells in x and z
+
+    """
+    factor = np.sqrt(values.size / (SIZE[0] * SIZE[1]))
+    return (round(SIZE[0] * factor), round(SIZE[1] * factor))
+
+
+def pool(values, size):
+    """
+    Distribution on the image with half of the cells in each direction
+
+    Args:
+        values (array): Flattened distribution (as in distribution())\n
+        size (tuple): Number of cells in x and z of the image
+
+    Returns:
+        values (array): Sum of the values in each block of 2x2 cells
+
+    """
+    n_x, n_z = size
+    blocks = values.reshape((2, n_x // 2, 2, n_z // 2), order="F")
+    return blocks.sum(axis=(0, 2)).flatten(order="F")
+
+
+def save_array(name, values):
+    """
+    Write an array in the cache folder, visible to other processes only once complete
+
+    Args:
+        name (str): Path to the npy file\n
+        values (array): Values to write
+
+    Returns:
+        None
+
+    """
+    os.makedirs(os.path.dirname(name), exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(name), suffix=".tmp", delete=False
+    ) as file:
+        np.save(file, values)
+    os.replace(file.name, name)
+
+
+# Methods to compute the Wasserstein distance (selected with emd_backend)
+BACKENDS = {
+    "pot": pot_emd,
+    "pot-mt": pot_threads_emd,
+    "cv2": cv2_emd,
+    "grid": grid_emd,
+    "sinkhorn": sinkhorn_emd,
+    "sliced": sliced_emd,
+    "pyramid": pyramid_emd,
+}
@@ -0,0 +1,257 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+# Modified from https://github.com/fluidflower/general/blob/main/evaluation/emd.py and
+# https://github.com/fluidflower/general/blob/main/evaluation/calculate_segmented_emds.py
+
+"""
+Utiliy functions to evaluate the Wasserstein distances of the metric job.
+"""
+
+import os
+import fcntl
+import tempfile
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from pofff.utils.emd import (
+    backend_size,
+    distribution,
+    experiment_distribution,
+    pyramid_distances,
+    wasserstein,
+)
+from pofff.utils.segmentation import segment_map
+
+
+def evaluate(cmdargs):
+    """
+    Wasserstein distances between the model and experimental maps at each time
+
+    Args:
+        cmdargs (dict): Command line arguments of the metric job
+
+    Returns:
+        dists (dict): Distances in g.cm at each time for each experimental run
+
+    """
+    times = [row.strip() for row in cmdargs["times"].split(",")]
+    runs = experimental_runs(cmdargs["experiment"])
+    pairs = load_distributions(cmdargs, times, runs)
+    if cmdargs["approximation"] == "none":
+        dists = exact(pairs, cmdargs)
+    else:
+        dists = screening(pairs, cmdargs)
+    return {
+        run: dists[i * len(times) : (i + 1) * len(times)] for i, run in enumerate(runs)
+    }
+
+
+def experimental_runs(names):
+    """
+    Experimental runs to history match
+
+    Args:
+        names (str): Runs separated by commas (e.g., 'run1,run3'), or 'all'
+
+    Returns:
+        runs (list): Names of the folders with the experimental data
+
+    """
+    if names.strip() == "all":
+        return [f"run{i}" for i in range(1, 6)]
+    return [f"run{name.strip()[-1]}" for name in names.split(",")]
+
+
+def load_distributions(cmdargs, times, runs):
+    """
+    Model and experimental distributions at each time for each experimental run
+
+    The model maps are segmented and resized once and shared by all runs.
+
+    Args:
+        cmdargs (dict): Command line arguments\n
+        times (list): Times for the images in [h]\n
+        runs (list): Names of the experimental runs
+
+    Returns:
+        pairs (list): Model and experimental distributions (ordered by run and time)
+
+    """
+    size = backend_size(cmdargs["backend"], int(cmdargs["levels"]))
+    models, names = [], []
+    for time in times:
+        file_i = f"{cmdargs['folder']}/spatial_map_{time}h.csv"
+        model_result_i = segment_map(
+            file_i,
+            float(cmdargs["minimumsaturation"]),
+            float(cmdargs["minimumconcentration"]),
+        )
+        name = f"{round(float(time) * 3600)}"
+        zeros = 6 - len(name)
+        for _ in range(zeros):
+            name = "0" + name
+        models.append(distribution(model_result_i, size))
+        names.append(name)
+    pairs = []
+    for run in runs:
+        for model, name in zip(models, names):
+            filename = (
+                f"{cmdargs['path']}/fluidflower/experiment/benchmarkdata/"
+                + f"spatial_maps/{run}/segmentation_"
+                + name
+                + "s.csv"
+            )
+            pairs.append(
+                (model, experiment_distribution(filename, cmdargs["cache"], size))
+            )
+    return pairs
+
+
+def distances(pairs, cmdargs, backend, **options):
+    """
+    Wasserstein distances between the model and experimental distributions
+
+    Args:
+        pairs (list): Model and experimental distributions at each time\n
+        cmdargs (dict): Command line arguments\n
+        backend (str): Name of the method in BACKENDS\n
+        options: Parameters of the approximations
+
+    Returns:
+        dists (list): Distances in g.cm at each time
+
+    """
+    workers = min(int(cmdargs["workers"]) or os.cpu_count() or 1, len(pairs))
+    if "pool" in cmdargs:
+        # Pool of the metric server shared by the concurrent realizations
+        values = solve(pairs, cmdargs["pool"].map, backend, **options)
+    elif workers < 2:
+        values = solve(pairs, map, backend, **options)
+    else:
+        # The solvers release the GIL, then threads share the distributions (the
+        # results are in the same order as the times)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            values = solve(pairs, pool.map, backend, **options)
+    # The calculated distances have the unit of normalized mass times meter.
+    # Multiply by 8.5, the injected mass of CO2 in g, and 100, to convert to g.cm.
+    return [8.5 * 100 * value for value in values]
+
+
+def solve(pairs, mapper, backend, **options):
+    """
+    Wasserstein distances of the pairs in normalized mass times meter
+
+    Args:
+        pairs (list): Model and experimental distributions at each time\n
+        mapper (callable): Map over the pairs (e.g., of a thread pool)\n
+        backend (str): Name of the method in BACKENDS\n
+        options: Parameters of the approximations
+
+    Returns:
+        values (list): Distances of the pairs
+
+    """
+    if backend == "pyramid":
+        # The pairs are refined together, then the objective does not mix levels
+        return pyramid_distances(pairs, mapper=mapper, **options)
+    compute = functools.partial(wasserstein, backend=backend, **options)
+    return list(mapper(compute, *zip(*pairs)))
+
+
+def exact(pairs, cmdargs):
+    """
+    Wasserstein distances with the backend given in the command line
+
+    Args:
+        pairs (list): Model and experimental distributions at each time\n
+        cmdargs (dict): Command line arguments
+
+    Returns:
+        dists (list): Distances in g.cm at each time
+
+    """
+    options = {}
+    if cmdargs["backend"] == "pyramid":
+        options["tolerance"] = float(cmdargs["tolerance"])
+    return distances(pairs, cmdargs, cmdargs["backend"], **options)
+
+
+def screening(pairs, cmdargs):
+    """
+    Approximate distances, replaced by the exact ones for the calibration samples
+    and for the candidates within the margin of the best exact value so far
+
+    Args:
+        pairs (list): Model and experimental distributions at each time\n
+        cmdargs (dict): Command line arguments
+
+    Returns:
+        dists (list): Distances in g.cm at each time
+
+    """
+    if cmdargs["approximation"] == "sinkhorn":
+        options = {"reg": float(cmdargs["regularization"])}
+    else:
+        options = {"projections": int(cmdargs["projections"])}
+    approx = distances(pairs, cmdargs, cmdargs["approximation"], **options)
+    with open(f"{cmdargs['output']}/emd_screening.lock", "a", encoding="utf8") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        samples, value = load_screening(cmdargs)
+    # Ratio of the exact to the approximated values fitted on the calibration samples
+    scale = 1.0
+    if samples[:, 0] @ samples[:, 0] > 0:
+        scale = (samples[:, 0] @ samples[:, 1]) / (samples[:, 0] @ samples[:, 0])
+    margin = float(cmdargs["margin"])
+    if len(samples) >= int(cmdargs["calibration"]) and (
+        margin < 0 or scale * np.mean(approx) > value * (1.0 + margin)
+    ):
+        print(
+            f"EMD ({cmdargs['approximation']}): screened out, exact not computed "
+            + f"(approximation scaled by {scale:.4f})"
+        )
+        return [scale * dist for dist in approx]
+    dists = exact(pairs, cmdargs)
+    with open(f"{cmdargs['output']}/emd_screening.lock", "a", encoding="utf8") as lock:
+        # The candidates of other realizations could have been added meanwhile
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        samples, value = load_screening(cmdargs)
+        if len(samples) < int(cmdargs["calibration"]):
+            with open(
+                f"{cmdargs['output']}/emd_calibration.csv", "a", encoding="utf8"
+            ) as file:
+                file.write(f"{np.mean(approx)},{np.mean(dists)}\n")
+            print(
+                f"EMD ({cmdargs['approximation']}): approximation gap "
+                + f"{np.mean(approx) - np.mean(dists):.4e} g.cm "
+                + f"({100 * (np.mean(approx) / np.mean(dists) - 1):.2f} %)"
+            )
+        if np.mean(dists) < value:
+            with tempfile.NamedTemporaryFile(
+                "w", dir=cmdargs["output"], suffix=".tmp", delete=False
+            ) as file:
+                file.write(f"{np.mean(dists)}")
+            os.replace(file.name, f"{cmdargs['output']}/emd_best.txt")
+    return dists
+
+
+def load_screening(cmdargs):
+    """
+    Calibration samples and best exact value written by the previous candidates
+
+    Args:
+        cmdargs (dict): Command line arguments
+
+    Returns:
+        samples (array): Approximated and exact mean distances of the calibration\n
+        value (float): Best exact mean distance so far
+
+    """
+    samples, value = np.zeros((0, 2)), np.inf
+    if os.path.isfile(f"{cmdargs['output']}/emd_calibration.csv"):
+        samples = np.loadtxt(
+            f"{cmdargs['output']}/emd_calibration.csv", delimiter=",", ndmin=2
+        )
+    if os.path.isfile(f"{cmdargs['output']}/emd_best.txt"):
+        with open(f"{cmdargs['output']}/emd_best.txt", "r", encoding="utf8") as file:
+            value = float(file.read())
+    return samples, value
@@ -8,6 +8,7 @@ Utiliy functions to set the requiried input values by pofff.
 
 import tomllib
 import numpy as np
+from pofff.utils.metricserver import socket_path
 
 
 def process_input(dic, in_file):
@@ -24,9 +25,31 @@ def process_input(dic, in_file):
     """
     dic["monotonic"] = False
     dic["popsize"] = 15
+    dic["binary"] = False
+    dic["restart_step"] = 0
+    dic["workers"] = 0
+    dic.update(
+        {
+            "cache": "",
+            "cache_size": 500,
+            "emd_backend": "pot",
+            "emd_levels": 3,
+            "emd_tolerance": 5e-2,
+            "emd_integrated": False,
+            "metric_server": False,
+            "emd_experiments": "",
+            "emd_approximation": "none",
+            "emd_regularization": 1e-2,
+            "emd_projections": 100,
+            "emd_margin": 0.1,
+            "emd_calibration": 5,
+        }
+    )
     dic["experiment"] = "run" + dic["experiment"][-1]
     with open(in_file, "rb") as file:
         dic.update(tomllib.load(file))
+    # The cache is only used if a folder is given
+    dic["cache_size"] = dic["cache_size"] if dic["cache"] else 0
     dic["PARA"] = {}
     for i in range(1, 7):
         dic["PARA"].update(dic[f"facie{i}"])
@@ -60,6 +83,16 @@ def process_input(dic, in_file):
     dic["sources"][1][-1] = dic["dims"][2] - dic["sources"][1][-1]
     dic["data"] = dic["fol"].split("/")[-1].upper()
     handle_thickness_map(dic)
+    handle_restarts(dic)
+    handle_workers(dic)
+    # Experimental runs for the metric job (e.g., "all" to use the five runs)
+    dic["runs"] = dic["emd_experiments"] or dic["experiment"]
+    # Socket of the metric server for the realizations of ert and everest
+    dic["server"] = (
+        socket_path(dic["fol"])
+        if dic["metric_server"] and dic["mode"] in ["ert", "everest"]
+        else ""
+    )
     dic["tuning"] = False
     for value in dic["flow"].split():
         if "--enable-tuning" in value:
@@ -78,20 +111,12 @@ def process_input(dic, in_file):
         or dic["grid"] != "corner-point"
     ):
         dic["cellmaps"] = []
-        dic["simxcent"] = []
-        dic["simzcent"] = []
         refx = np.arange(0, 2.8 + 5.0e-3, 1.0e-2)
         refz = np.arange(0, 1.2 + 5.0e-3, 1.0e-2)
         refx = 0.5 * (refx[1:] + refx[:-1])
         refz = 0.5 * (refz[1:] + refz[:-1])
-        dic["refxgrid"] = np.zeros(280 * 120)
-        dic["refzgrid"] = np.zeros(280 * 120)
-        ind = 0
-        for zcen in refz:
-            for xcen in refx:
-                dic["refxgrid"][ind] = xcen
-                dic["refzgrid"][ind] = zcen
-                ind += 1
+        dic["refxgrid"] = np.tile(refx, refz.size)
+        dic["refzgrid"] = np.repeat(refz, refx.size)
 
 
 def handle_thickness_map(dic):
@@ -116,13 +141,8 @@ def handle_thickness_map(dic):
         dic["refzd"] = 1.5 - np.arange(0, 1.5 + 5.0e-3, 1.0e-2)
         dic["refxcent"] = 0.5 * (dic["refx"][1:] + dic["refx"][:-1])
         dic["refzdcent"] = 0.5 * (dic["refzd"][1:] + dic["refzd"][:-1])
-        dic["refxthickness"], dic["refzthickness"] = [], []
-        for k in dic["refzdcent"]:
-            for i in dic["refxcent"]:
-                dic["refxthickness"].append(i)
-                dic["refzthickness"].append(k)
-        dic["refxthickness"] = np.array(dic["refxthickness"])
-        dic["refzthickness"] = np.array(dic["refzthickness"])
+        dic["refxthickness"] = np.tile(dic["refxcent"], dic["refzdcent"].size)
+        dic["refzthickness"] = np.repeat(dic["refzdcent"], dic["refxcent"].size)
     elif dic["thickness"] == "initial":
         dic["multpv"] = []
         thickness = np.genfromtxt(
@@ -138,3 +158,70 @@ def handle_thickness_map(dic):
         )
     else:
         dic["dims"][1] = float(dic["thickness"])
+
+
+def handle_restarts(dic):
+    """
+    Set the report steps in the schedule that write the restart files
+
+    Args:
+        dic (dict): Global dictionary
+
+    Returns:
+        dic (dict): Modified global dictionary
+
+    """
+    steps = [max(round(inj[0] / inj[1]), 1) for inj in dic["inj"]]
+    ends = np.cumsum(np.repeat([inj[1] for inj in dic["inj"]], steps))
+    write = np.full(ends.size, dic["restart_step"] <= 0 or ends.size == 1)
+    if not write.all():
+        # The dense times are measured from the start of the injection
+        first = next(
+            (j for j, inj in enumerate(dic["inj"]) if max(inj[2:4]) > 0),
+            len(dic["inj"]),
+        )
+        start = sum(dic["inj"][j][1] * steps[j] for j in range(first))
+        dense = [float(value) * 3600 for value in str(dic["times"]).split(",")]
+        if len(dense) == 1:
+            dense = np.arange(dense[0], ends[-1] - start + dense[0], dense[0])
+        targets = start + np.concatenate(
+            (
+                dense,
+                np.arange(dic["restart_step"], ends[-1] - start, dic["restart_step"]),
+            )
+        )
+        # Closest report step to each required time
+        ind = np.searchsorted(ends, targets).clip(1, ends.size - 1)
+        ind -= targets - ends[ind - 1] < ends[ind] - targets
+        write[ind] = True
+        write[ends == start] = True
+        write[-1] = True
+    dic["restarts"], state, pos = [], True, 0
+    for nstep in steps:
+        dic["restarts"].append([])
+        while nstep:
+            count = np.argmin(np.append(write[pos : pos + nstep] == write[pos], False))
+            dic["restarts"][-1].append(
+                [int(count), bool(write[pos]), bool(state != write[pos])]
+            )
+            state = write[pos]
+            pos += count
+            nstep -= count
+
+
+def handle_workers(dic):
+    """
+    Set the number of simulations sharing the cores with the data and metric jobs
+
+    The jobs divide the cores available when they run (e.g., the allocation in a
+    cluster node) by this number, up to the workers entry if positive.
+
+    Args:
+        dic (dict): Global dictionary
+
+    Returns:
+        dic (dict): Modified global dictionary
+
+    """
+    # Simulations running at the same time in ert/everest (one in single mode)
+    dic["nsim"] = dic.get("cores", 1) if dic["mode"] in ["ert", "everest"] else 1
@@ -8,10 +8,12 @@ Utiliy function for the grid and locations in the geological models.
 
 import os
 import csv
+from itertools import chain
 import numpy as np
 import pandas as pd
-from shapely.geometry import Point, Polygon
-from alive_progress import alive_bar
+from scipy.spatial import cKDTree
+from shapely import contains_xy, prepare
+from shapely.geometry import Polygon
 from pofff.utils.writefile import create_corner_point_grid
 
 
@@ -35,13 +37,7 @@ def grid(dic):
             dic[f"{name}"] = np.linspace(0, dic["dims"][i], dic["noCells"][i] + 1)
     else:
         for i, (name, arr) in enumerate(zip(["xmx", "ymy", "zmz"], ["x", "y", "z"])):
-            dic[f"{name}"] = [0.0]
-            for j, num in enumerate(dic[f"{arr}"]):
-                for k in range(num):
-                    dic[f"{name}"].append(
-                        (j + (k + 1.0) / num) * dic["dims"][i] / len(dic[f"{arr}"])
-                    )
-            dic[f"{name}"] = np.array(dic[f"{name}"])
+            dic[f"{name}"] = refinement(dic[f"{arr}"], dic["dims"][i])
             dic["noCells"][i] = len(dic[f"{name}"]) - 1
     if dic["grid"] != "corner-point":
         for name, size in zip(["xmx", "ymy", "zmz"], ["dx", "dy", "dz"]):
@@ -60,55 +56,19 @@ def structured_handling_fluidflower(dic):
         dic (dict): Modified global dictionary
 
     """
-    sensor1, sensor2 = [], []
-    with alive_bar(dic["noCells"][0] * dic["noCells"][2]) as bar_animation:
-        for k in range(dic["noCells"][2]):
-            for i in range(dic["noCells"][0]):
-                bar_animation()
-                n = -1
-                for ind in range(len(dic["polygons"])):
-                    if dic["polygons"][ind].contains(
-                        Point(dic["xmx_center"][i], dic["zmz_center"][k])
-                    ):
-                        n = dic["facies"][ind]
-                        break
-                sensor1.append(
-                    (dic["xmx_center"][i] - dic["sensors"][0][0]) ** 2
-                    + (dic["zmz_center"][k] + dic["sensors"][0][2] - dic["dims"][2])
-                    ** 2
-                )
-                sensor2.append(
-                    (dic["xmx_center"][i] - dic["sensors"][1][0]) ** 2
-                    + (dic["zmz_center"][k] + dic["sensors"][1][2] - dic["dims"][2])
-                    ** 2
-                )
-                dic["fluxnum"].append(str(n))
-                boxes(
-                    dic,
-                    dic["xmx_center"][i],
-                    dic["zmz_center"][k],
-                    dic["fluxnum"][-1],
-                )
-                if "multpv" in dic:
-                    indx = pd.Series(
-                        abs(
-                            (dic["refxthickness"] - dic["xmx_center"][i]) ** 2
-                            + (
-                                dic["refzthickness"]
-                                - dic["dims"][2]
-                                + dic["zmz_center"][k]
-                            )
-                            ** 2
-                        )
-                    ).argmin()
-                    dic["multpv"].append(str(dic["multThickness"][indx]))
-                if "cellmaps" in dic:
-                    dic["simxcent"].append(dic["xmx_center"][i])
-                    dic["simzcent"].append(dic["dims"][2] - dic["zmz_center"][k])
-    dic["pop1"] = pd.Series(sensor1).argmin()
-    dic["pop2"] = pd.Series(sensor2).argmin()
-    dic["fipnum"][dic["pop1"]] = "8"
-    dic["fipnum"][dic["pop2"]] = "9"
+    x_c = np.tile(dic["xmx_center"], dic["noCells"][2])
+    z_c = np.repeat(dic["zmz_center"], dic["noCells"][0])
+    classify(dic, x_c, z_c)
+    dic["pop1"] = np.argmin(
+        (x_c - dic["sensors"][0][0]) ** 2
+        + (z_c + dic["sensors"][0][2] - dic["dims"][2]) ** 2
+    )
+    dic["pop2"] = np.argmin(
+        (x_c - dic["sensors"][1][0]) ** 2
+        + (z_c + dic["sensors"][1][2] - dic["dims"][2]) ** 2
+    )
+    dic["fipnum"][dic["pop1"]] = 8
+    dic["fipnum"][dic["pop2"]] = 9
     sensors(dic)
     wells(dic)
 
@@ -124,131 +84,109 @@ def corner_point_handling_fluidflower(dic):
         dic (dict): Modified global dictionary
 
     """
-    well1, well2, sensor1, sensor2 = [], [], [], []
+    x_c = np.array(dic["xyz"])[:, 0]
+    z_c = np.array(dic["xyz"])[:, 2]
+    classify(dic, x_c, z_c)
+    dic["pop1"] = np.argmin(
+        (x_c - dic["sensors"][0][0]) ** 2
+        + (z_c + dic["sensors"][0][2] - dic["dims"][2]) ** 2
+    )
+    dic["pop2"] = np.argmin(
+        (x_c - dic["sensors"][1][0]) ** 2
+        + (z_c + dic["sensors"][1][2] - dic["dims"][2]) ** 2
+    )
+    dic["fipnum"][dic["pop1"]] = 8
+    dic["fipnum"][dic["pop2"]] = 9
     dic["wellijk"] = [[] for _ in range(len(dic["sources"]))]
-    with alive_bar(dic["no_cells"]) as bar_animation:
-        for i in range(dic["no_cells"]):
-            bar_animation()
-            i_x = int(i % dic["noCells"][0])
-            k_z = int(np.floor(i / dic["noCells"][0]))
-            n = -1
-            for ind in range(len(dic["polygons"])):
-                if dic["polygons"][ind].contains(
-                    Point(dic["xyz"][i][0], dic["xyz"][i][2])
-                ):
-                    n = dic["facies"][ind]
-                    break
-            well1.append(
-                (dic["sources"][0][0] - dic["xyz"][i][0]) ** 2
-                + (dic["sources"][0][2] - dic["xyz"][i][2]) ** 2
-            )
-            well2.append(
-                (dic["sources"][1][0] - dic["xyz"][i][0]) ** 2
-                + (dic["sources"][1][2] - dic["xyz"][i][2]) ** 2
-            )
-            sensor1.append(
-                (dic["xyz"][i][0] - dic["sensors"][0][0]) ** 2
-                + (dic["xyz"][i][2] + dic["sensors"][0][2] - dic["dims"][2]) ** 2
-            )
-            sensor2.append(
-                (dic["xyz"][i][0] - dic["sensors"][1][0]) ** 2
-                + (dic["xyz"][i][2] + dic["sensors"][1][2] - dic["dims"][2]) ** 2
-            )
-            dic["fluxnum"].append(str(n))
-            boxes(dic, dic["xyz"][i][0], dic["xyz"][i][2], dic["fluxnum"][-1])
-            if "multpv" in dic:
-                indx = pd.Series(
-                    abs(
-                        (dic["refxthickness"] - dic["xyz"][i][0]) ** 2
-                        + (dic["refzthickness"] - dic["dims"][2] + dic["xyz"][i][2])
-                        ** 2
-                    )
-                ).argmin()
-                dic["multpv"].append(str(dic["multThickness"][indx]))
-            if "cellmaps" in dic:
-                dic["simxcent"].append(dic["xyz"][i][0])
-                dic["simzcent"].append(dic["dims"][2] - dic["xyz"][i][2])
-    dic["pop1"] = pd.Series(sensor1).argmin()
-    dic["pop2"] = pd.Series(sensor2).argmin()
-    dic["fipnum"][dic["pop1"]] = "8"
-    dic["fipnum"][dic["pop2"]] = "9"
-    idwell1 = pd.Series(well1).argmin()
-    idwell2 = pd.Series(well2).argmin()
-    i_x = int(idwell1 % dic["noCells"][0])
-    k_z = int(np.floor(idwell1 / dic["noCells"][0]))
-    well1ijk = [i_x, 0, k_z]
-    i_x = int(idwell2 % dic["noCells"][0])
-    k_z = int(np.floor(idwell2 / dic["noCells"][0]))
-    well2ijk = [i_x, 0, k_z]
-    i_x = int(dic["pop1"] % dic["noCells"][0])
-    k_z = int(np.floor(dic["pop1"] / dic["noCells"][0]))
-    dic["sensorijk"][0] = [i_x, 0, k_z]
-    i_x = int(dic["pop2"] % dic["noCells"][0])
-    k_z = int(np.floor(dic["pop2"] / dic["noCells"][0]))
-    dic["sensorijk"][1] = [i_x, 0, k_z]
-    dic["wellijk"][0] = [well1ijk[0] + 1, 1, well1ijk[2] + 1]
-    dic["wellijk"][1] = [well2ijk[0] + 1, 1, well2ijk[2] + 1]
-
-
-def boxes(dic, x_c, z_c, fluxnum):
+    for j, source in enumerate(dic["sources"][:2]):
+        idwell = np.argmin((source[0] - x_c) ** 2 + (source[2] - z_c) ** 2)
+        dic["wellijk"][j] = [
+            int(idwell % dic["noCells"][0]) + 1,
+            1,
+            int(idwell // dic["noCells"][0]) + 1,
+        ]
+    for j, pop in enumerate([dic["pop1"], dic["pop2"]]):
+        dic["sensorijk"][j] = [
+            int(pop % dic["noCells"][0]),
+            0,
+            int(pop // dic["noCells"][0]),
+        ]
+
+
+def classify(dic, x_c, z_c):
     """
-    Find the global indices for the different boxes for the report data
+    Assign the facies and fipnum to all cell centers at once
 
     Args:
         dic (dict): Global dictionary\n
-        x_c (float): x-position of the cell center\n
-        z_c (float): z-position of the cell center\n
-        fluxnum (int): Number of the facie in the cell
+        x_c (array): x-positions of the cell centers\n
+        z_c (array): z-positions of the cell centers
 
     Returns:
         dic (dict): Modified global dictionary
 
     """
-    if (
-        (dic["dims"][2] - z_c >= dic["boxb"][0][2])
-        & (dic["dims"][2] - z_c <= dic["boxb"][1][2])
-        & (x_c >= dic["boxb"][0][0])
-        & (x_c <= dic["boxb"][1][0])
-    ):
-        check_facie1(dic, fluxnum, "6", "3")
-    elif (
-        (dic["dims"][2] - z_c >= dic["boxc"][0][2])
-        & (dic["dims"][2] - z_c <= dic["boxc"][1][2])
-        & (x_c >= dic["boxc"][0][0])
-        & (x_c <= dic["boxc"][1][0])
-    ):
-        check_facie1(dic, fluxnum, "12", "4")
-    elif (
-        (dic["dims"][2] - z_c >= dic["boxa"][0][2])
-        & (dic["dims"][2] - z_c <= dic["boxa"][1][2])
-        & (x_c >= dic["boxa"][0][0])
-        & (x_c <= dic["boxa"][1][0])
-    ):
-        check_facie1(dic, fluxnum, "5", "2")
-    elif fluxnum == "1":
-        dic["fipnum"].append("7")
-    else:
-        dic["fipnum"].append("1")
+    dic["fluxnum"] = np.full(x_c.size, -1, dtype=np.int8)
+    pending = np.arange(x_c.size)
+    for polygon, facie in zip(dic["polygons"], dic["facies"]):
+        if pending.size == 0:
+            break
+        prepare(polygon)
+        inside = contains_xy(polygon, x_c[pending], z_c[pending])
+        dic["fluxnum"][pending[inside]] = facie
+        pending = pending[~inside]
+    dic["fipnum"] = boxes(dic, x_c, z_c, dic["fluxnum"]).astype(np.int8)
+    if "multpv" in dic:
+        dic["multpv"] = dic["multThickness"][
+            nearest(
+                np.column_stack((dic["refxthickness"], dic["refzthickness"])),
+                np.column_stack((x_c, dic["dims"][2] - z_c)),
+                2,
+                lambda i, j: abs(
+                    (dic["refxthickness"][i] - x_c[j]) ** 2
+                    + (dic["refzthickness"][i] - dic["dims"][2] + z_c[j]) ** 2
+                ),
+            )
+        ]
+    if "cellmaps" in dic:
+        dic["simxcent"] = x_c
+        dic["simzcent"] = dic["dims"][2] - z_c
 
 
-def check_facie1(dic, fluxnum, numa, numb):
+def boxes(dic, x_c, z_c, fluxnum):
     """
-    Handle the overlaping with facie 1
+    Find the fipnum for the different boxes for the report data
 
     Args:
         dic (dict): Global dictionary\n
-        fluxnum (int): Number of the facie in the cell\n
-        numa (int): Fipnum to assign to the cell if it overlaps with Facie 1\n
-        numb (int): Fipnum to assign to the cell otherwise.
+        x_c (array): x-positions of the cell centers\n
+        z_c (array): z-positions of the cell centers\n
+        fluxnum (array): Number of the facie in the cells
 
     Returns:
-        dic (dict): Modified global dictionary
+        fipnum (array): Fipnum of the cells
 
     """
-    if fluxnum == "1":
-        dic["fipnum"].append(numa)
-    else:
-        dic["fipnum"].append(numb)
+    inbox = []
+    for name in ["boxb", "boxc", "boxa"]:
+        inbox.append(
+            (dic["dims"][2] - z_c >= dic[name][0][2])
+            & (dic["dims"][2] - z_c <= dic[name][1][2])
+            & (x_c >= dic[name][0][0])
+            & (x_c <= dic[name][1][0])
+        )
+    # Cells overlapping with facie 1 get their own fipnum inside the boxes
+    facie1 = fluxnum == 1
+    return np.select(
+        inbox + [facie1],
+        [
+            np.where(facie1, 6, 3),
+            np.where(facie1, 12, 4),
+            np.where(facie1, 5, 2),
+            7,
+        ],
+        1,
+    )
 
 
 def positions(dic):
@@ -263,8 +201,6 @@ def positions(dic):
 
     """
     dic["sensorijk"] = [[] for _ in range(len(dic["sensors"]))]
-    for names in ["fluxnum", "fipnum", "porv"]:
-        dic[f"{names}"] = []
     if dic["grid"] == "corner-point":
         corner_point_handling_fluidflower(dic)
     else:
@@ -286,17 +222,40 @@ def get_cellmaps(dic):
         None
 
     """
-    cellmaps = []
     print("\nMapping simulation to reporting grid, please wait.")
-    with alive_bar(len(dic["refxgrid"])) as bar_animation:
-        for xcen, zcen in zip(dic["refxgrid"], dic["refzgrid"]):
-            bar_animation()
-            cellmaps.append(
-                np.argmin(
-                    np.abs(dic["simxcent"] - xcen) + np.abs(dic["simzcent"] - zcen)
-                )
-            )
-    np.save(f"{dic['deck']}/cellmap", cellmaps)
+    dic["cellmap"] = nearest(
+        np.column_stack((dic["simxcent"], dic["simzcent"])),
+        np.column_stack((dic["refxgrid"], dic["refzgrid"])),
+        1,
+        lambda i, j: np.abs(dic["simxcent"][i] - dic["refxgrid"][j])
+        + np.abs(dic["simzcent"][i] - dic["refzgrid"][j]),
+    )
+    np.save(f"{dic['deck']}/cellmap", dic["cellmap"])
+
+
+def nearest(points, queries, norm, distance):
+    """
+    Find for each query the first point with the minimum distance (as np.argmin)
+
+    Args:
+        points (array): Coordinates of the reference points (n, 2)\n
+        queries (array): Coordinates of the query points (m, 2)\n
+        norm (int): Minkowski p-norm consistent with the distance (1 or 2)\n
+        distance (function): Exact distance between points[i] and queries[j]
+
+    Returns:
+        indices (array): Index of the closest point to each query point
+
+    """
+    tree = cKDTree(points)
+    dmin = tree.query(queries, p=norm)[0]
+    # Candidates within a small tolerance to resolve ties as the brute-force argmin
+    candidates = tree.query_ball_point(queries, dmin * (1.0 + 1e-9) + 1e-12, p=norm)
+    count = np.fromiter(map(len, candidates), dtype=int, count=len(candidates))
+    jdx = np.repeat(np.arange(len(candidates)), count)
+    idx = np.fromiter(chain.from_iterable(candidates), dtype=int, count=count.sum())
+    order = np.lexsort((idx, distance(idx, jdx), jdx))
+    return idx[order][np.cumsum(count) - count]
 
 
 def sensors(dic):
@@ -486,72 +445,89 @@ def corner(dic):
     """
     # Read the geometries
     horizonts = get_lines(dic)
-    xcoord, zcoord = [], []
-    dic["xmx"] = [0.0]
-    for i, n_x in enumerate(dic["x"]):
-        for j in range(n_x):
-            dic["xmx"].append((i + (j + 1.0) / n_x) * dic["dims"][0] / len(dic["x"]))
-    dic["ymy"] = [0.0]
-    for i, n_y in enumerate(dic["y"]):
-        for j in range(n_y):
-            dic["ymy"].append((i + (j + 1.0) / n_y) * dic["dims"][1] / len(dic["y"]))
+    dic["xmx"] = refinement(dic["x"], dic["dims"][0])
+    dic["ymy"] = refinement(dic["y"], dic["dims"][1])
     dic["noCells"][1] = len(dic["ymy"]) - 1
-    for xcor in dic["xmx"]:
-        for _, lcor in enumerate(horizonts):
-            xcoord.append(xcor)
-            idx = pd.Series([abs(ii[0] - xcor) for ii in lcor]).argmin()
-            if lcor[idx][0] < xcor:
-                zcoord.append(
-                    lcor[idx][1]
-                    + (
-                        (lcor[idx + 1][1] - lcor[idx][1])
-                        / (lcor[idx + 1][0] - lcor[idx][0])
-                    )
-                    * (xcor - lcor[idx][0])
-                )
-            else:
-                zcoord.append(
-                    lcor[idx - 1][1]
-                    + (
-                        (lcor[idx][1] - lcor[idx - 1][1])
-                        / (lcor[idx][0] - lcor[idx - 1][0])
-                    )
-                    * (xcor - lcor[idx - 1][0])
-                )
-    res = list(filter(lambda i: i == zcoord[-1], zcoord))[0]
-    n_z = zcoord.index(res)
-    res = list(filter(lambda i: i > 0, xcoord))[0]
-    n_x = round(len(xcoord) / xcoord.index(res)) - 1
-    dic["noCells"][0], dic["noCells"][2] = n_x, n_z
+    xcoord = np.repeat(dic["xmx"], len(horizonts))
+    zcoord = np.column_stack(
+        [np.interp(dic["xmx"], *np.array(horizont).T) for horizont in horizonts]
+    ).ravel()
+    dic["noCells"][0] = round(len(xcoord) / np.flatnonzero(xcoord > 0)[0]) - 1
+    dic["noCells"][2] = int(np.flatnonzero(zcoord == zcoord[-1])[0])
     # Refine the grid
     xcoord, zcoord, dic["noCells"][0], dic["noCells"][2] = refinement_z(
         xcoord, zcoord, dic["noCells"][0], dic["noCells"][2], dic["z"]
     )
-    dic["xmx"] = np.array(dic["xmx"])
-    dic["ymy_center"] = 0.5 * (np.array(dic["ymy"])[1:] + np.array(dic["ymy"])[:-1])
-    dic["d_y"] = np.array(dic["ymy"])[1:] - np.array(dic["ymy"])[:-1]
-    dic["d_x"] = np.array(dic["xmx"])[1:] - np.array(dic["xmx"])[:-1]
+    dic["ymy_center"] = 0.5 * (dic["ymy"][1:] + dic["ymy"][:-1])
+    dic["d_y"] = dic["ymy"][1:] - dic["ymy"][:-1]
+    dic["d_x"] = dic["xmx"][1:] - dic["xmx"][:-1]
     dic["no_cells"] = dic["noCells"][0] * dic["noCells"][2]
+    dic["xcoord"], dic["zcoord"] = xcoord, zcoord
     create_corner_point_grid(dic, xcoord, zcoord)
-    dic["xyz"] = []
-    dic["d_z"] = []
-    for k in range(dic["noCells"][2]):
-        for i in range(dic["noCells"][0]):
-            n = (i * (dic["noCells"][2] + 1)) + k
-            m = ((i + 1) * (dic["noCells"][2] + 1)) + k
-            poly = Polygon(
-                [
-                    [xcoord[n], zcoord[n]],
-                    [xcoord[m], zcoord[m]],
-                    [xcoord[m + 1], zcoord[m + 1]],
-                    [xcoord[n + 1], zcoord[n + 1]],
-                    [xcoord[n], zcoord[n]],
-                ]
+    # Corners of the cells (i, k) ordered as the polygons p0, p1, p2, and p3
+    xcor = xcoord.reshape(dic["noCells"][0] + 1, dic["noCells"][2] + 1)
+    zcor = zcoord.reshape(dic["noCells"][0] + 1, dic["noCells"][2] + 1)
+    pxs = [xcor[:-1, :-1], xcor[1:, :-1], xcor[1:, 1:], xcor[:-1, 1:]]
+    pzs = [zcor[:-1, :-1], zcor[1:, :-1], zcor[1:, 1:], zcor[:-1, 1:]]
+    # Shoelace formula and triangle-fan centroid in the same order as GEOS
+    area = np.zeros(pxs[0].shape)
+    for i in range(1, 4):
+        area = area + (pxs[i] - pxs[0]) * (pzs[i - 1] - pzs[(i + 1) % 4])
+    area = np.abs(area / 2.0)
+    area1 = (pxs[1] - pxs[0]) * (pzs[2] - pzs[0]) - (pxs[2] - pxs[0]) * (
+        pzs[1] - pzs[0]
+    )
+    area2 = (pxs[2] - pxs[0]) * (pzs[3] - pzs[0]) - (pxs[3] - pxs[0]) * (
+        pzs[2] - pzs[0]
+    )
+    # Pinched cells (zero area) use the centroid of the edges as GEOS
+    lengths = [
+        np.sqrt((pxs[i] - pxs[(i + 1) % 4]) ** 2 + (pzs[i] - pzs[(i + 1) % 4]) ** 2)
+        for i in range(4)
+    ]
+    pinched = area1 + area2 == 0
+    centroids = []
+    for pts in [pxs, pzs]:
+        cent = np.zeros(pts[0].shape)
+        cent[~pinched] = (
+            (
+                area1[~pinched] * (pts[0] + pts[1] + pts[2])[~pinched]
+                + area2[~pinched] * (pts[0] + pts[2] + pts[3])[~pinched]
             )
-            pxz = poly.centroid.wkt
-            pxz = list(float(j) for j in pxz[7:-1].split(" "))
-            dic["xyz"].append([pxz[0], 0, pxz[1]])
-            dic["d_z"].append(poly.area / (xcoord[m] - xcoord[n]))
+            / 3
+            / (area1 + area2)[~pinched]
+        )
+        line, total = np.zeros(pts[0].shape), np.zeros(pts[0].shape)
+        for i, length in enumerate(lengths):
+            line += length * ((pts[i] + pts[(i + 1) % 4]) / 2)
+            total += length
+        cent[pinched] = line[pinched] / total[pinched]
+        centroids.append(cent.T.ravel())
+    dic["xyz"] = np.column_stack(
+        (centroids[0], np.zeros(dic["no_cells"]), centroids[1])
+    )
+    dic["d_z"] = (area / (pxs[1] - pxs[0])).T.ravel()
+
+
+def refinement(nums, length):
+    """
+    Coordinates of the cell faces after refining each interval
+
+    Args:
+        nums (list): Integers with the number of cells per interval\n
+        length (float): Length of the domain
+
+    Returns:
+        coord (array): Floats with the coordinates of the cell faces
+
+    """
+    return np.concatenate(
+        [[0.0]]
+        + [
+            (i + (np.arange(num) + 1.0) / num) * length / len(nums)
+            for i, num in enumerate(nums)
+        ]
+    )
 
 
 def refinement_z(xci, zci, ncx, ncz, znr):
@@ -559,36 +535,41 @@ def refinement_z(xci, zci, ncx, ncz, znr):
     Refinement of the grid in the z-dir
 
     Args:
-        xci (list): Floats with the x-coordinates of the cell corners\n
-        zci (list): Floats with the z-coordinates of the cell corners\n
+        xci (array): Floats with the x-coordinates of the cell corners\n
+        zci (array): Floats with the z-coordinates of the cell corners\n
         ncx (int): Number of cells in the x-dir\n
         ncz (int): Number of cells in the z-dir\n
         znr (list): Integers with the number of z-refinements per cell
 
     Returns:
-        xcr (list): Floats with the new x-coordinates of the cell corners\n
-        zcr (list): Floats with the new z-coordinates of the cell corners\n
+        xcr (array): Floats with the new x-coordinates of the cell corners\n
+        zcr (array): Floats with the new z-coordinates of the cell corners\n
         ncx (int): New number of cells in the x-dir\n
         ncz (int): New number of cells in the z-dir
 
     """
+    intervals = np.repeat(np.arange(ncz), znr[:ncz])
+    alp = np.concatenate(
+        [[]]
+        + [
+            np.arange(1.0 / num, 1.0 + 1.0 / num, 1.0 / num)[:num]
+            for num in znr[:ncz]
+            if num > 0
+        ]
+    )
     xcr, zcr = [], []
-    for j in range(ncx + 1):
-        zcr.append(zci[j * (ncz + 1)])
-        xcr.append(xci[j * (ncz + 1)])
-        for i in range(ncz):
-            for k in range(znr[i]):
-                alp = np.arange(1.0 / znr[i], 1.0 + 1.0 / znr[i], 1.0 / znr[i]).tolist()
-                zcr.append(
-                    zci[j * (ncz + 1) + i]
-                    + (zci[j * (ncz + 1) + i + 1] - zci[j * (ncz + 1) + i]) * alp[k]
-                )
-                xcr.append(
-                    xci[j * (ncz + 1) + i]
-                    + (xci[j * (ncz + 1) + i + 1] - xci[j * (ncz + 1) + i]) * alp[k]
+    for coord, new in zip([xci, zci], [xcr, zcr]):
+        coord = np.asarray(coord)[: (ncx + 1) * (ncz + 1)].reshape(ncx + 1, ncz + 1)
+        new.append(
+            np.hstack(
+                (
+                    coord[:, :1],
+                    coord[:, intervals]
+                    + (coord[:, intervals + 1] - coord[:, intervals]) * alp,
                 )
-    res = list(filter(lambda i: i > 0, xcr))[0]
-    ncx = round(len(xcr) / xcr.index(res)) - 1
-    res = list(filter(lambda i: i == zcr[-1], zcr))[0]
-    ncz = zcr.index(res)
+            ).ravel()
+        )
+    xcr, zcr = xcr[0], zcr[0]
+    ncx = round(len(xcr) / np.flatnonzero(xcr > 0)[0]) - 1
+    ncz = int(np.flatnonzero(zcr == zcr[-1])[0])
     return xcr, zcr, ncx, ncz
@@ -0,0 +1,163 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""
+Utiliy functions to evaluate the metric of the realizations in a long-lived process.
+
+The server keeps the imported modules and experimental distributions in memory, while
+the metric jobs only send their arguments through a Unix socket (then this module only
+imports the standard library).
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import argparse
+import subprocess
+import socketserver
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MetricHandler(socketserver.StreamRequestHandler):
+    """Evaluate the metric of one realization in a thread of the server"""
+
+    def handle(self):
+        start, folder = time.time(), None
+        try:
+            cmdargs = json.loads(self.rfile.readline())
+            folder = cmdargs["folder"]
+            # The distances of all realizations are computed in the same pool
+            cmdargs["pool"] = self.server.pool
+            answer = {"dists": self.server.evaluate(cmdargs)}
+        except Exception as error:  # pylint: disable=W0718
+            answer = {"error": repr(error)}
+        print(f"Metric of {folder}: {time.time() - start:.2f} s", flush=True)
+        self.wfile.write((json.dumps(answer) + "\n").encode())
+
+
+def socket_path(folder):
+    """
+    Name of the socket of the server for an output folder
+
+    Args:
+        folder (str): Path to the output folder
+
+    Returns:
+        path (str): Socket in the runtime folder of the user if set (the length of
+        the path is limited), otherwise in the output folder
+
+    """
+    runtime = os.environ.get("XDG_RUNTIME_DIR", "")
+    if runtime and os.path.isdir(runtime):
+        key = hashlib.sha256(os.path.abspath(folder).encode()).hexdigest()[:16]
+        return f"{runtime}/pofff_{key}.sock"
+    return f"{os.path.abspath(folder)}/metric_server.sock"
+
+
+def request(path, cmdargs):
+    """
+    Send the arguments of a metric job to the server and wait for the distances
+
+    Args:
+        path (str): Socket of the server\n
+        cmdargs (dict): Command line arguments of the metric job
+
+    Returns:
+        dists (dict): Distances in g.cm at each time for each experimental run
+
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        client.sendall((json.dumps(cmdargs) + "\n").encode())
+        with client.makefile("r", encoding="utf8") as file:
+            answer = json.loads(file.readline() or "{}")
+    if "dists" not in answer:
+        raise ValueError(answer.get("error", "no answer from the server"))
+    return answer["dists"]
+
+
+def start_server(dic):
+    """
+    Launch the metric server before running ert or everest
+
+    Args:
+        dic (dict): Global dictionary
+
+    Returns:
+        None
+
+    """
+    if not dic["server"]:
+        return
+    if os.path.exists(dic["server"]):
+        os.remove(dic["server"])
+    with open(f"{dic['fol']}/metric_server.log", "w", encoding="utf8") as file:
+        # pylint: disable-next=R1732
+        dic["server_process"] = subprocess.Popen(
+            [
+                sys.executable,
+                f"{dic['path']}/utils/metricserver.py",
+                "-s",
+                dic["server"],
+                "-w",
+                str(dic.get("cores", 1) * dic["workers"]),
+            ],
+            stdout=file,
+            stderr=subprocess.STDOUT,
+        )
+
+
+def stop_server(dic):
+    """
+    Terminate the metric server after ert or everest
+
+    Args:
+        dic (dict): Global dictionary
+
+    Returns:
+        None
+
+    """
+    if "server_process" not in dic:
+        return
+    dic["server_process"].terminate()
+    dic["server_process"].wait()
+    del dic["server_process"]
+    if os.path.exists(dic["server"]):
+        os.remove(dic["server"])
+
+
+def main():
+    """Serve the metric jobs until terminated"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s", "--socket", help="Path to the Unix socket.")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        default="0",
+        help="Number of threads to compute the distances ('0' by default, i.e., "
+        "all cores).",
+    )
+    cmdargs = vars(parser.parse_args())
+    # Imported once for all the realizations
+    from pofff.utils.evaluation import evaluate  # pylint: disable=C0415
+
+    # Only the user can connect to the socket
+    os.umask(0o077)
+    with socketserver.ThreadingUnixStreamServer(
+        cmdargs["socket"], MetricHandler
+    ) as server:
+        os.chmod(cmdargs["socket"], 0o600)
+        server.evaluate = evaluate
+        server.pool = ThreadPoolExecutor(
+            max_workers=int(cmdargs["workers"]) or os.cpu_count() or 1
+        )
+        print(f"Metric server listening on {cmdargs['socket']}", flush=True)
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
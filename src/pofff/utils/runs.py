@@ -4,8 +4,10 @@
 """
 Utiliy functions for the simulations, data processing, and plotting.
 """
+
 import os
 import subprocess
+from pofff.utils.metricserver import start_server, stop_server
 
 
 def flow(dic):
@@ -44,6 +46,10 @@ def data(dic):
             f"{dic['deck']}/cellmap.npy",
             "-t",
             dic["times"],
+            "-w",
+            str(dic["workers"]),
+            "-j",
+            str(dic["nsim"]),
         ],
         check=True,
     )
@@ -54,7 +60,7 @@ def data(dic):
             "python",
             f"{dic['path']}/jobs/metric.py",
             "-e",
-            dic["experiment"],
+            dic["runs"],
             "-p",
             dic["path"],
             "-t",
@@ -63,13 +69,53 @@ def data(dic):
             dic["msat"],
             "-c",
             dic["mcon"],
-        ],
+            "-b",
+            dic["emd_backend"],
+            "-w",
+            str(dic["workers"]),
+            "-j",
+            str(dic["nsim"]),
+        ]
+        + (["-d", dic["cache"]] if dic["cache_size"] > 0 else [])
+        + emd_options(dic),
         check=True,
     )
     if prosc.returncode != 0:
         raise ValueError(f"Invalid result: { prosc.returncode }")
 
 
+def emd_options(dic):
+    """
+    Arguments for the metric job to set the objective, pyramid, and approximations
+
+    Args:
+        dic (dict): Global dictionary
+
+    Returns:
+        args (list): Options of the Wasserstein distances, empty if not used
+
+    """
+    args = ["-i", "1"] if dic["emd_integrated"] else []
+    if dic["emd_backend"] == "pyramid":
+        args += ["-l", str(dic["emd_levels"]), "-x", str(dic["emd_tolerance"])]
+    if dic["emd_approximation"] == "none":
+        return args
+    return args + [
+        "-a",
+        dic["emd_approximation"],
+        "-r",
+        str(dic["emd_regularization"]),
+        "-n",
+        str(dic["emd_projections"]),
+        "-g",
+        str(dic["emd_margin"]),
+        "-k",
+        str(dic["emd_calibration"]),
+        "-o",
+        dic["fol"],
+    ]
+
+
 def benchmark(dic):
     """
     Generate the benchmark figures
@@ -130,6 +176,8 @@ def benchmark(dic):
             dic["add"],
             "-u",
             dic["use"],
+            "-b",
+            dic["emd_backend"],
         ],
         check=True,
     )
@@ -170,7 +218,11 @@ def everest(dic):
     """
     for name in ["data", "delete", "metric"]:
         os.system(f"chmod u+x {dic['jobs']}/{name}.py")
-    os.system("everest run everest.yml")
+    start_server(dic)
+    try:
+        os.system("everest run everest.yml")
+    finally:
+        stop_server(dic)
     postprocess(dic)
 
 
@@ -187,7 +239,11 @@ def ert(dic):
     """
     for name in ["data", "delete", "metric"]:
         os.system(f"chmod u+x {dic['jobs']}/{name}.py")
-    os.system(f"ert {dic['ertargs']} ert.txt")
+    start_server(dic)
+    try:
+        os.system(f"ert {dic['ertargs']} ert.txt")
+    finally:
+        stop_server(dic)
     postprocess(dic)
 
 
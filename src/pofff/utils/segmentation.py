@@ -0,0 +1,106 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+# Modified from
+# https://github.com/fluidflower/general/blob/main/visualization/generate_segmented_images.py
+
+"""
+Utiliy functions to segment the spatial maps with the benchmark format.
+"""
+
+import numpy as np
+
+# Offset of the first row and column in the experimental image for each grid size
+LAYOUTS = {(280, 120): 0, (286, 123): 3}
+
+
+def grid_size(xlim, zlim):
+    """
+    Number of cells of 1 cm in the spatial map
+
+    Args:
+        xlim (list): Minimum and maximum horizontal coordinates in [m]\n
+        zlim (list): Minimum and maximum vertical coordinates in [m]
+
+    Returns:
+        size (tuple): Number of cells in the x and z directions
+
+    """
+    n_x = np.arange(xlim[0], xlim[1] + 5.0e-3, 1.0e-2).size - 1
+    n_z = np.arange(zlim[0], zlim[1] + 5.0e-3, 1.0e-2).size - 1
+    return n_x, n_z
+
+
+def read_map(file_name, size):
+    """
+    Read the gas saturation and co2 concentration of a spatial map
+
+    Args:
+        file_name (str): Name of the csv file with the spatial values\n
+        size (tuple): Number of cells in the x and z directions
+
+    Returns:
+        saturation (array): Gas saturation (first row at the bottom)\n
+        concentration (array): Dissolved co2 (first row at the bottom)
+
+    """
+    with open(file_name, "r", encoding="utf8") as file:
+        skip_header = 0 if file.readline()[0].isnumeric() else 1
+    values = np.loadtxt(
+        file_name,
+        delimiter=",",
+        skiprows=skip_header,
+        usecols=(2, 3),
+        max_rows=size[0] * size[1],
+        ndmin=2,
+    )
+    return (
+        values[:, 0].reshape(size[1], size[0]),
+        values[:, 1].reshape(size[1], size[0]),
+    )
+
+
+def segment(saturation, concentration, satmin, conmin):
+    """
+    From continuous values to discrete for the gas (2) and dissolved (1) co2
+
+    Args:
+        saturation (array): Gas saturation (first row at the bottom)\n
+        concentration (array): Dissolved co2 (first row at the bottom)\n
+        satmin (float): Threshold for the gas saturation\n
+        conmin (float): Threshold for the dissolved co2
+
+    Returns:
+        segmented (array): Segmented image (first row at the top) of 120x280
+
+    """
+    n_z, n_x = saturation.shape
+    if (n_x, n_z) not in LAYOUTS:
+        raise ValueError(f"Unsupported size {n_x}x{n_z} of the spatial map")
+    # For the 286x123 maps, the first three rows and columns and the last three
+    # columns are not contained in the experimental data
+    offset = LAYOUTS[(n_x, n_z)]
+    window = (slice(offset, offset + 120), slice(offset, offset + 280))
+    segmented = np.where(
+        saturation[window] > satmin,
+        2,
+        np.where(concentration[window] > conmin, 1, 0),
+    )
+    return np.flipud(segmented).astype(int)
+
+
+def segment_map(file_name, satmin, conmin, xlim=(0.0, 2.8), zlim=(0.0, 1.2)):
+    """
+    Read and segment a spatial map
+
+    Args:
+        file_name (str): Name of the csv file with the spatial values\n
+        satmin (float): Threshold for the gas saturation\n
+        conmin (float): Threshold for the dissolved co2\n
+        xlim (list): Minimum and maximum horizontal coordinates in [m]\n
+        zlim (list): Minimum and maximum vertical coordinates in [m]
+
+    Returns:
+        segmented (array): Segmented image (first row at the top) of 120x280
+
+    """
+    return segment(*read_map(file_name, grid_size(xlim, zlim)), satmin, conmin)
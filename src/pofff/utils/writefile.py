@@ -8,6 +8,7 @@ Utiliy functions to write files and variables
 
 import os
 import subprocess
+import numpy as np
 from mako.template import Template
 
 
@@ -16,53 +17,123 @@ def create_corner_point_grid(dic, xcoord, zcoord):
     Write the corner-point grid
 
     Args:
-        dic (dict): Global dictionary
+        dic (dict): Global dictionary\n
+        xcoord (array): x-positions of the grid corners\n
+        zcoord (array): z-positions of the grid corners
 
     Returns:
         None
 
     """
-    grid, tmp = [], []
-    grid.append("-- This deck was generated by pofff https://github.com/OPM/pofff\n")
-    grid.append("-- Copyright (C) 2025 NORCE Research AS\n")
-    grid.append("COORD\n")
-    for j in range(dic["noCells"][1] + 1):
-        for i in range(dic["noCells"][0] + 1):
-            tmp.append(
-                f"{xcoord[i * (dic['noCells'][2] + 1)]:E} {dic['ymy'][j]} 0 "
-                f"{xcoord[i * (dic['noCells'][2] + 1) + dic['noCells'][2]]:E} {dic['ymy'][j]:E} 0 "
-            )
-    grid += compact_format("".join(tmp).split())
-    grid.append("/\n")
-    grid.append("ZCORN\n")
-    tmp = []
-    for i in range(dic["noCells"][0]):
-        tmp.append(
-            f"{zcoord[i*(dic['noCells'][2]+1)]:E} {zcoord[(i+1)*(dic['noCells'][2]+1)]:E} "
+    if dic["binary"]:
+        write_import(
+            f"{dic['deck']}/GRID.IMPORT",
+            dict(zip(["COORD", "ZCORN"], corner_point_arrays(dic, xcoord, zcoord))),
         )
-    tmp.extend(tmp[-dic["noCells"][0] :])
-    for k in range(dic["noCells"][2] - 1):
-        for i in range(dic["noCells"][0]):
-            tmp.append(
-                f"{zcoord[(i * (dic['noCells'][2] + 1)) + k + 1]:E} "
-                + f"{zcoord[((i + 1) * (dic['noCells'][2] + 1)) + k + 1]:E} "
-            )
-        tmp.extend(tmp[-dic["noCells"][0] :])
-        tmp.extend(tmp[-2 * dic["noCells"][0] :])
-    for i in range(dic["noCells"][0]):
-        tmp.append(
-            f"{zcoord[((i + 1) * (dic['noCells'][2] + 1)) - 1]:E} "
-            + f"{zcoord[((i + 2) * (dic['noCells'][2] + 1)) - 1]:E} "
-        )
-    tmp.extend(tmp[-dic["noCells"][0] :])
-    grid += compact_format("".join(tmp).split())
-    grid.append("/")
+        return
+    coord, zcorn = corner_point_arrays(dic, xcoord, zcoord)
+    # The values are rounded as in the ':E' format, except the first y of each pillar
+    coord = coord.reshape(-1, 6)
+    coord = np.column_stack(
+        (e_format(coord[:, 0]), coord[:, 1], e_format(coord[:, 2:]))
+    )
     with open(
         f"{dic['deck']}/GRID.INC",
         "w",
         encoding="utf8",
     ) as file:
-        file.write("".join(grid))
+        file.write("-- This deck was generated by pofff https://github.com/OPM/pofff\n")
+        file.write("-- Copyright (C) 2025 NORCE Research AS\n")
+        file.write("COORD\n")
+        file.writelines(compact_format(coord.ravel()))
+        file.write("/\n")
+        file.write("ZCORN\n")
+        file.writelines(compact_format(e_format(zcorn)))
+        file.write("/")
+
+
+def e_format(values):
+    """
+    Round the values to the precision of the ':E' format
+
+    Args:
+        values (array): Values to round
+
+    Returns:
+        values (array): Rounded values
+
+    """
+    values = np.asarray(values, dtype=float)
+    flat = values.ravel()
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Powers of ten to have seven digits before the decimal point
+        shift = 6 - np.floor(np.log10(np.abs(flat)))
+        mantissa = flat * 10.0**shift
+        shift += (np.abs(mantissa) < 1e6).astype(float) - (np.abs(mantissa) >= 1e7)
+        # Exact powers, so the division is the closest float to the ':E' text
+        power = 10.0 ** np.abs(shift)
+        mantissa = np.where(shift >= 0, flat * power, flat / power)
+        rounded = np.round(mantissa)
+        result = np.where(shift >= 0, rounded / power, rounded * power)
+        # The text is only needed for zeros, huge exponents, and close to the ties
+        text = (
+            ~np.isfinite(result)
+            | (np.abs(shift) > 22)
+            | (np.abs(np.abs(mantissa - np.trunc(mantissa)) - 0.5) < 1e-6)
+        )
+    result[text] = [float(f"{value:E}") for value in flat[text].tolist()]
+    return result.reshape(values.shape)
+
+
+def corner_point_arrays(dic, xcoord, zcoord):
+    """
+    Order the grid corners as the COORD and ZCORN keywords
+
+    Args:
+        dic (dict): Global dictionary\n
+        xcoord (array): x-positions of the grid corners\n
+        zcoord (array): z-positions of the grid corners
+
+    Returns:
+        coord (array): Values of the pillars\n
+        zcorn (array): Depths of the cell corners
+
+    """
+    xcor = np.asarray(xcoord).reshape(dic["noCells"][0] + 1, dic["noCells"][2] + 1)
+    zcor = np.asarray(zcoord).reshape(dic["noCells"][0] + 1, dic["noCells"][2] + 1)
+    coord = np.zeros((len(dic["ymy"]), dic["noCells"][0] + 1, 6))
+    coord[:, :, 0] = xcor[:, 0]
+    coord[:, :, 3] = xcor[:, -1]
+    coord[:, :, 1] = coord[:, :, 4] = np.asarray(dic["ymy"])[:, None]
+    # Depths at the left and right sides of the cells for each surface
+    surfaces = np.stack((zcor[:-1].T, zcor[1:].T), axis=2).reshape(
+        dic["noCells"][2] + 1, -1
+    )
+    zcorn = np.stack((surfaces[:-1], surfaces[:-1], surfaces[1:], surfaces[1:]), axis=1)
+    return coord.ravel(), zcorn.ravel()
+
+
+def write_import(name, keywords):
+    """
+    Write the keywords in a binary file to be loaded by OPM Flow with IMPORT
+
+    Args:
+        name (str): Path to the binary file\n
+        keywords (dict): Keyword names and values
+
+    Returns:
+        None
+
+    """
+    from opm.io.ecl import EclOutput  # pylint: disable=C0415
+
+    output = EclOutput(name)
+    for keyword, values in keywords.items():
+        values = np.asarray(values)
+        output.write(
+            keyword.upper(),
+            values.astype(np.int32 if values.dtype.kind in "iu" else np.float64),
+        )
 
 
 def write_keywords(dic):
@@ -73,37 +144,33 @@ def write_keywords(dic):
         dic (dict): Global dictionary
 
     Returns:
-        dic (dict): Modified global dictionary
+        None
 
     """
     git = "-- This deck was generated by pofff https://github.com/OPM/pofff\n"
-    dic["dx"] = False
-    keywords = ["fluxnum", "fipnum"]
+    keywords = {name: dic[name] for name in ["fluxnum", "fipnum"]}
     if dic["grid"] == "tensor":
-        keywords += ["dx", "dz"]
-        dic["dx"] = list(map(str, list((dic["xmx"][1:] - dic["xmx"][:-1]))))
-        d_z = list(map(str, list((dic["zmz"][1:] - dic["zmz"][:-1]))))
-        dic["dz"] = [d_z[0]] * dic["noCells"][0]
-        for i in range(dic["noCells"][2] - 1):
-            dic["dx"].extend(dic["dx"][-dic["noCells"][0] :])
-            dic["dz"] += [d_z[i + 1]] * dic["noCells"][0]
+        keywords["dx"] = np.tile(dic["xmx"][1:] - dic["xmx"][:-1], dic["noCells"][2])
+        keywords["dz"] = np.repeat(dic["zmz"][1:] - dic["zmz"][:-1], dic["noCells"][0])
     if "multpv" in dic:
-        mults = ["multpv", "multx", "multx-", "multz", "multz-"]
-        keywords += mults
-        for name in mults:
-            dic[name] = dic["multpv"].copy()
-    for names in keywords:
-        dic[f"{names}"] = compact_format(dic[f"{names}"])
-        dic[f"{names}"].insert(0, f"{names.upper()}\n")
-        dic[f"{names}"].insert(0, git)
-        dic[f"{names}"].insert(0, "-- Copyright (C) 2025 NORCE Research AS\n")
-        dic[f"{names}"].append("/")
+        for name in ["multpv", "multx", "multx-", "multz", "multz-"]:
+            keywords[name] = dic["multpv"]
+    if dic["binary"]:
+        fipnum = {"fipnum": keywords.pop("fipnum")}
+        write_import(f"{dic['deck']}/PROPERTIES.IMPORT", keywords)
+        write_import(f"{dic['deck']}/FIPNUM.IMPORT", fipnum)
+        return
+    for name, values in keywords.items():
         with open(
-            f"{dic['deck']}/{names.upper()}.INC",
+            f"{dic['deck']}/{name.upper()}.INC",
             "w",
             encoding="utf8",
         ) as file:
-            file.write("".join(dic[f"{names}"]))
+            file.write("-- Copyright (C) 2025 NORCE Research AS\n")
+            file.write(git)
+            file.write(f"{name.upper()}\n")
+            file.writelines(compact_format(values))
+            file.write("/")
 
 
 def opm_files(dic):
@@ -199,30 +266,22 @@ def compact_format(values):
     Use the 'n*x' notation to write repited values to save storage
 
     Args:
-        values (list): List with the variable values
+        values (array): Variable values
 
     Returns:
         values (list): List with the compacted variable values
 
     """
-    n, value0, tmp = 0, float(values[0]), []
-    for value in values:
-        if value0 != float(value) or len(values) == 1:
-            if value0 == 0:
-                tmp.append(f"{n}*0 " if n > 1 else "0 ")
-            elif value0.is_integer():
-                tmp.append(f"{n}*{int(value0)} " if n > 1 else f"{int(value0)} ")
-            else:
-                tmp.append(f"{n}*{value0} " if n > 1 else f"{value0} ")
-            n = 1
-            value0 = float(value)
-        else:
-            n += 1
-    if value0 == float(values[-1]) and len(values) > 1:
-        if value0 == 0:
-            tmp.append(f"{n}*0 " if n > 1 else "0 ")
-        elif value0.is_integer():
-            tmp.append(f"{n}*{int(value0)} " if n > 1 else f"{int(value0)} ")
-        else:
-            tmp.append(f"{n}*{value0} " if n > 1 else f"{value0} ")
-    return tmp
+    values = np.asarray(values, dtype=float).ravel()
+    starts = np.flatnonzero(np.append(True, values[1:] != values[:-1]))
+    counts = np.diff(np.append(starts, values.size))
+    # Format each distinct value once
+    unique, inverse = np.unique(values[starts], return_inverse=True)
+    text = [
+        "0" if value == 0 else str(int(value)) if value.is_integer() else str(value)
+        for value in unique.tolist()
+    ]
+    return [
+        f"{n}*{text[i]} " if n > 1 else f"{text[i]} "
+        for n, i in zip(counts.tolist(), inverse.tolist())
+    ]
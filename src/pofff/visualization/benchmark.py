@@ -39,6 +39,7 @@ def postprocessing():
     dic["l"] = cmdargs["location"]
     dic["a"] = cmdargs["add"]
     dic["u"] = cmdargs["use"] == "1"
+    dic["b"] = cmdargs["backend"]
     benchmark(dic)
 
 
@@ -58,14 +59,14 @@ def benchmark(dic):
                 f"python3 {dic['p']}general/evaluation/"
                 + "calculate_segmented_emds_simplified_pofff.py "
                 + f"-p {dic['p']} -satmin {dic['s']} "
-                + f"-conmin {dic['c']} -l {dic['l']} -a {dic['a']}"
+                + f"-conmin {dic['c']} -l {dic['l']} -a {dic['a']} -b {dic['b']}"
             )
         else:
             os.system(
                 "python3 "
                 + f"{dic['p']}general/evaluation/calculate_segmented_emds_pofff.py "
                 + f"-p {dic['p']} -satmin {dic['s']} "
-                + f"-conmin {dic['c']} -l {dic['l']} -a {dic['a']}"
+                + f"-conmin {dic['c']} -l {dic['l']} -a {dic['a']} -b {dic['b']}"
             )
         os.system(
             "python3 "
@@ -132,6 +133,15 @@ def load_parser():
         "concentration of 1e-1 and 5e-2 (min sat of 1e-2) to speed up the "
         "computations ('1' by default; set to '0' to compute all).",
     )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        default="pot",
+        help="Method to compute the Wasserstein distance, 'pot', 'pot-mt' (POT with "
+        "all cores), 'cv2' (OpenCV), 'grid' (L1 ground cost on the 280x120 maps "
+        "instead of 140x60 images), or 'pyramid' (coarse to fine images) ('pot' by "
+        "default).",
+    )
     return vars(parser.parse_known_args()[0])
 
 
@@ -14,6 +14,7 @@ import numpy as np
 import matplotlib
 import matplotlib.pyplot as plt
 from matplotlib import colors
+from pofff.utils.segmentation import segment_map
 
 font = {"family": "normal", "weight": "normal", "size": 12}
 matplotlib.rc("font", **font)
@@ -99,43 +100,15 @@ def segment(file, satmin, conmin):
         conmin (float): Threshold for the dissolved co2
 
     Returns:
-        None
+        segmented (array): Segmented image (first row at the top)\n
+        x (array): Horizontal coordinates of the cell corners\n
+        z (array): Vertical coordinates of the cell corners
 
     """
     xspace = np.arange(0, 2.8 + 5.0e-3, 1.0e-2)
     zspace = np.arange(0, 1.2 + 5.0e-3, 1.0e-2)
     x, z = np.meshgrid(xspace, zspace)
-    nx = xspace.size - 1
-    nz = zspace.size - 1
-
-    skip_header = 0
-    with open(file, "r", encoding="utf8") as text:
-        if not (text.readline()[0]).isnumeric():
-            skip_header = 1
-
-    saturation = np.zeros([nz, nx])
-    concentration = np.zeros([nz, nx])
-    values = np.genfromtxt(file, delimiter=",", skip_header=skip_header)
-    for i in np.arange(0, nz):
-        saturation[i, :] = values[i * nx : (i + 1) * nx, 2]
-        concentration[i, :] = values[i * nx : (i + 1) * nx, 3]
-
-    segmented = np.zeros((120, 280), dtype=int)
-
-    offset = 0
-    if nx == 286:
-        offset = 3
-
-    # Start from the fourth row as the first three are not contained in the experimental data
-    for i in np.arange(offset, nz):
-        # For the same reason, exclude the first and last three columns
-        for j in np.arange(offset, nx - offset):
-            # The first row of the segment map corresponds to the top of the domain
-            if saturation[i, j] > satmin:
-                segmented[119 + offset - i, j - offset] = 2
-            elif concentration[i, j] > conmin:
-                segmented[119 + offset - i, j - offset] = 1
-
+    segmented = segment_map(file, satmin, conmin)
     return segmented, x, z
 
 
@@ -0,0 +1,64 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Test the segmentation of the spatial maps against the previous cell-by-cell loop"""
+
+import pathlib
+import numpy as np
+import pytest
+from pofff.utils.segmentation import segment, segment_map
+
+mainpth: pathlib.Path = pathlib.Path(__file__).parents[1]
+
+
+def loop_read_map(file_name, n_x, n_z):
+    """Previous reading of the spatial map with np.genfromtxt one row at a time"""
+    with open(file_name, "r", encoding="utf8") as file:
+        skip_header = 0 if file.readline()[0].isnumeric() else 1
+    values = np.genfromtxt(file_name, delimiter=",", skip_header=skip_header)
+    saturation, concentration = np.zeros([n_z, n_x]), np.zeros([n_z, n_x])
+    for i in np.arange(0, n_z):
+        saturation[i, :] = values[i * n_x : (i + 1) * n_x, 2]
+        concentration[i, :] = values[i * n_x : (i + 1) * n_x, 3]
+    return saturation, concentration
+
+
+def loop_segment_map(file_name, satmin, conmin, xlim=(0.0, 2.8), zlim=(0.0, 1.2)):
+    """Previous implementation with nested loops"""
+    n_x = np.arange(xlim[0], xlim[1] + 5.0e-3, 1.0e-2).size - 1
+    n_z = np.arange(zlim[0], zlim[1] + 5.0e-3, 1.0e-2).size - 1
+    saturation, concentration = loop_read_map(file_name, n_x, n_z)
+    segmented = np.zeros((120, 280), dtype=int)
+    offset = 3 if n_x == 286 else 0
+    for i in np.arange(offset, n_z):
+        for j in np.arange(offset, n_x - offset):
+            if saturation[i, j] > satmin:
+                segmented[119 + offset - i, j - offset] = 2
+            elif concentration[i, j] > conmin:
+                segmented[119 + offset - i, j - offset] = 1
+    return segmented
+
+
+def test_segment_map():
+    """Same images for the 280x120 and 286x123 maps, with and without header"""
+    folder = f"{mainpth}/src/pofff/fluidflower"
+    for name, limits in [
+        ("cssr/conmin1e-1/spatial_map_72h.csv", {}),
+        ("heriot-watt/spatial_map_24h.csv", {}),
+        (
+            "austin/spatial_maps/spatial_map_72h.csv",
+            {"xlim": (-0.015, 2.845), "zlim": (-0.015, 1.215)},
+        ),
+        (
+            "lanl/spatial_map_24h.csv",
+            {"xlim": (-0.015, 2.845), "zlim": (-0.015, 1.215)},
+        ),
+    ]:
+        for satmin, conmin in [(0.7, 0.1), (0.2, 0.05)]:
+            result = segment_map(f"{folder}/{name}", satmin, conmin, **limits)
+            assert result.shape == (120, 280), "Issue with the test_10_segmentation.py"
+            assert np.array_equal(
+                result, loop_segment_map(f"{folder}/{name}", satmin, conmin, **limits)
+            ), "Issue with the test_10_segmentation.py"
+    with pytest.raises(ValueError):
+        segment(np.zeros((50, 100)), np.zeros((50, 100)), 0.7, 0.1)
@@ -0,0 +1,75 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Test the metric server against the evaluation in the metric job"""
+
+import os
+import stat
+import time
+import shutil
+import pathlib
+import subprocess
+import pytest
+from pofff.utils.metricserver import request, socket_path, start_server, stop_server
+
+testpth: pathlib.Path = pathlib.Path(__file__).parent
+mainpth: pathlib.Path = pathlib.Path(__file__).parents[1]
+
+
+def test_socket_path(monkeypatch):
+    """Socket in the runtime folder of the user if set, otherwise in the output"""
+    folder = f"{testpth}/output/metricserver"
+    os.makedirs(folder, exist_ok=True)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    assert (
+        socket_path(folder) == f"{folder}/metric_server.sock"
+    ), "Issue with the test_11_metricserver.py"
+    monkeypatch.setenv("XDG_RUNTIME_DIR", folder)
+    path = socket_path(f"{folder}/../metricserver")
+    assert path == socket_path(folder), "Issue with the test_11_metricserver.py"
+    assert path.startswith(f"{folder}/pofff_"), "Issue with the test_11_metricserver.py"
+    assert path != socket_path(testpth), "Issue with the test_11_metricserver.py"
+
+
+def test_server():
+    """Same objective through the server, which only the user can connect to"""
+    folder = f"{testpth}/output/metricserver"
+    os.makedirs(folder, exist_ok=True)
+    shutil.copy(
+        f"{mainpth}/src/pofff/fluidflower/cssr/conmin1e-1/spatial_map_24h.csv", folder
+    )
+    command = ["python", f"{mainpth}/src/pofff/jobs/metric.py", "-t", "24"]
+    command += ["-p", f"{mainpth}/src/pofff", "-b", "pyramid", "-l", "1"]
+    subprocess.run(command, cwd=folder, check=True)
+    with open(f"{folder}/func", "r", encoding="utf8") as file:
+        expected = file.read()
+    dic = {"fol": folder, "path": f"{mainpth}/src/pofff", "workers": 1}
+    dic["server"] = socket_path(folder)
+    start_server(dic)
+    try:
+        for _ in range(600):
+            if os.path.exists(dic["server"]) or dic["server_process"].poll():
+                break
+            time.sleep(0.1)
+        assert (
+            stat.S_IMODE(os.stat(dic["server"]).st_mode) == 0o600
+        ), "Issue with the test_11_metricserver.py"
+        os.remove(f"{folder}/func")
+        result = subprocess.run(
+            command + ["-m", dic["server"]],
+            cwd=folder,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        assert "not used" not in result.stdout, "Issue with the test_11_metricserver.py"
+        with open(f"{folder}/func", "r", encoding="utf8") as file:
+            assert file.read() == expected, "Issue with the test_11_metricserver.py"
+        # The errors of the evaluation are sent back to the job
+        with pytest.raises(ValueError):
+            request(dic["server"], {"folder": folder})
+        with pytest.raises(ValueError, match="KeyError"):
+            request(dic["server"], {})
+    finally:
+        stop_server(dic)
+    assert not os.path.exists(dic["server"]), "Issue with the test_11_metricserver.py"
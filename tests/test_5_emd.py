@@ -0,0 +1,64 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Test the grid backend for the Wasserstein distance"""
+
+import pathlib
+import numpy as np
+import ot
+from pofff.utils.emd import (
+    SIZE,
+    backend_size,
+    distribution,
+    grid_emd,
+    segment_image,
+)
+
+mainpth: pathlib.Path = pathlib.Path(__file__).parents[1]
+
+
+def test_emd():
+    """Compare the min-cost flow to ot.emd2 with L1 cost on the benchmark maps"""
+    folder = f"{mainpth}/src/pofff/fluidflower/experiment/benchmarkdata/spatial_maps"
+    distributions = [
+        distribution(
+            np.loadtxt(
+                f"{folder}/{run}/segmentation_086400s.csv", dtype="int", delimiter=","
+            )[30:, :]
+        )
+        for run in ["run2", "run4"]
+    ]
+    n_x, n_z = SIZE
+    cc_x, cc_z = np.meshgrid(np.arange(n_x), np.arange(n_z), indexing="ij")
+    centers = np.vstack(
+        (cc_x.flatten("F") / n_x * 2.8, cc_z.flatten("F") / n_z * 1.2)
+    ).T
+    expected = ot.emd2(
+        distributions[0],
+        distributions[1],
+        ot.dist(centers, centers, metric="cityblock"),
+        numItermax=5000000,
+    )
+    assert np.isclose(
+        grid_emd(distributions[0], distributions[1]), expected, rtol=1e-8
+    ), "Issue with the test_5_emd.py"
+    assert (
+        grid_emd(distributions[0], distributions[0]) == 0.0
+    ), "Issue with the test_5_emd.py"
+
+
+def test_native():
+    """The grid backend uses the segmented maps without resizing them"""
+    folder = f"{mainpth}/src/pofff/fluidflower/experiment/benchmarkdata/spatial_maps"
+    segmentation = np.loadtxt(
+        f"{folder}/run2/segmentation_086400s.csv", dtype="int", delimiter=","
+    )[30:, :]
+    assert (
+        backend_size("grid") == segmentation.shape[::-1]
+    ), "Issue with the test_5_emd.py"
+    assert backend_size("pot") == SIZE, "Issue with the test_5_emd.py"
+    image = np.asarray(segment_image(segmentation), dtype=float)
+    values = distribution(segmentation, backend_size("grid"))
+    assert np.allclose(
+        np.sort(values), np.sort(image.ravel() / image.sum()), rtol=0, atol=1e-15
+    ), "Issue with the test_5_emd.py"
@@ -0,0 +1,136 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Test the vectorized grid routines against the previous cell-by-cell loops"""
+
+import os
+import pathlib
+import numpy as np
+from shapely.geometry import Point, Polygon
+from pofff.utils.mapproperties import (
+    classify,
+    corner,
+    getpolygons,
+    nearest,
+    refinement,
+    refinement_z,
+)
+
+testpth: pathlib.Path = pathlib.Path(__file__).parent
+mainpth: pathlib.Path = pathlib.Path(__file__).parents[1]
+
+
+def test_classify():
+    """Facies with Polygon.contains and the fipnum boxes checked one cell at a time"""
+    dic = {"path": f"{mainpth}/src/pofff", "dims": [2.8, 0.01, 1.2]}
+    dic["boxa"] = [[1.1, 0.0, 0.0], [2.8, 0.01, 0.6]]
+    dic["boxb"] = [[0.0, 0.0, 0.6], [1.1, 0.01, 1.2]]
+    dic["boxc"] = [[1.1, 0.0, 0.1], [2.6, 0.01, 0.4]]
+    getpolygons(dic)
+    x_c, z_c = np.meshgrid(
+        (np.arange(112) + 0.5) * 2.8 / 112, (np.arange(48) + 0.5) * 1.2 / 48
+    )
+    x_c, z_c = x_c.ravel(), z_c.ravel()
+    classify(dic, x_c, z_c)
+    fluxnum, fipnum = [], []
+    for x_p, z_p in zip(x_c, z_c):
+        fluxnum.append(-1)
+        for polygon, facie in zip(dic["polygons"], dic["facies"]):
+            if polygon.contains(Point(x_p, z_p)):
+                fluxnum[-1] = facie
+                break
+        fipnum.append(1 if fluxnum[-1] != 1 else 7)
+        for name, numa, numb in [("boxb", 6, 3), ("boxc", 12, 4), ("boxa", 5, 2)]:
+            if (
+                dic[name][0][2] <= dic["dims"][2] - z_p <= dic[name][1][2]
+                and dic[name][0][0] <= x_p <= dic[name][1][0]
+            ):
+                fipnum[-1] = numa if fluxnum[-1] == 1 else numb
+                break
+    assert np.array_equal(dic["fluxnum"], fluxnum), "Issue with the test_6_grid.py"
+    assert np.array_equal(dic["fipnum"], fipnum), "Issue with the test_6_grid.py"
+
+
+def test_nearest():
+    """KD-tree query with the same ties as np.argmin over all the points"""
+    rng = np.random.default_rng(0)
+    # Points on a lattice and queries halfway between them to have many ties
+    points = rng.integers(0, 20, (400, 2)) * 0.05
+    queries = np.vstack((rng.random((200, 2)), rng.integers(0, 40, (200, 2)) * 0.025))
+    for norm in [1, 2]:
+
+        def distance(i, j, norm=norm):
+            return np.sum(np.abs(points[i] - queries[j]) ** norm, axis=-1)
+
+        expected = [
+            np.argmin(distance(np.arange(len(points)), j)) for j in range(len(queries))
+        ]
+        assert np.array_equal(
+            nearest(points, queries, norm, distance), expected
+        ), "Issue with the test_6_grid.py"
+
+
+def test_refinement():
+    """Coordinates of the cell faces of the tensor grid"""
+    nums, length = [3, 1, 4, 7, 2], 1.2
+    coord = [0.0]
+    for j, num in enumerate(nums):
+        for k in range(num):
+            coord.append((j + (k + 1.0) / num) * length / len(nums))
+    assert np.array_equal(
+        refinement(nums, length), coord
+    ), "Issue with the test_6_grid.py"
+
+
+def test_refinement_z():
+    """Coordinates of the corner-point grid after the z-refinement"""
+    ncx, ncz, znr = 4, 3, [2, 3, 1]
+    xci = np.repeat(np.linspace(0, 2.8, ncx + 1), ncz + 1).tolist()
+    zci = np.tile([0.0, 0.3, 0.7, 1.2], ncx + 1) + np.repeat(
+        np.linspace(0, 0.1, ncx + 1), ncz + 1
+    )
+    xcr, zcr = [], []
+    for j in range(ncx + 1):
+        xcr.append(xci[j * (ncz + 1)])
+        zcr.append(zci[j * (ncz + 1)])
+        for i in range(ncz):
+            alp = np.arange(1.0 / znr[i], 1.0 + 1.0 / znr[i], 1.0 / znr[i]).tolist()
+            for k in range(znr[i]):
+                for old, new in zip([xci, zci], [xcr, zcr]):
+                    ind = j * (ncz + 1) + i
+                    new.append(old[ind] + (old[ind + 1] - old[ind]) * alp[k])
+    result = refinement_z(xci, zci, ncx, ncz, znr)
+    assert np.array_equal(result[0], xcr), "Issue with the test_6_grid.py"
+    assert np.array_equal(result[1], zcr), "Issue with the test_6_grid.py"
+    ncx = round(len(xcr) / xcr.index(next(x for x in xcr if x > 0))) - 1
+    assert result[2:] == (ncx, zcr.index(zcr[-1])), "Issue with the test_6_grid.py"
+
+
+def test_corner():
+    """Centroids and thicknesses of the corner-point cells as the shapely polygons"""
+    dic = {"path": f"{mainpth}/src/pofff", "dims": [2.8, 0.019, 1.2]}
+    dic.update({"x": [5, 60, 7], "y": [1], "z": [0, 2, 1, 3, 2, 2, 2, 3, 3, 3, 1]})
+    dic.update({"noCells": [72, 1, 22], "binary": False})
+    dic["deck"] = f"{testpth}/output/grid"
+    os.makedirs(dic["deck"], exist_ok=True)
+    getpolygons(dic)
+    corner(dic)
+    xcor = dic["xcoord"].reshape(dic["noCells"][0] + 1, dic["noCells"][2] + 1)
+    zcor = dic["zcoord"].reshape(dic["noCells"][0] + 1, dic["noCells"][2] + 1)
+    xyz, d_z = [], []
+    for k in range(dic["noCells"][2]):
+        for i in range(dic["noCells"][0]):
+            poly = Polygon(
+                [
+                    [xcor[i, k], zcor[i, k]],
+                    [xcor[i + 1, k], zcor[i + 1, k]],
+                    [xcor[i + 1, k + 1], zcor[i + 1, k + 1]],
+                    [xcor[i, k + 1], zcor[i, k + 1]],
+                ]
+            )
+            xyz.append([poly.centroid.x, 0, poly.centroid.y])
+            d_z.append(poly.area / (xcor[i + 1, k] - xcor[i, k]))
+    assert np.allclose(
+        dic["xyz"], xyz, rtol=0, atol=1e-14
+    ), "Issue with the test_6_grid.py"
+    assert np.allclose(dic["d_z"], d_z, rtol=1e-12), "Issue with the test_6_grid.py"
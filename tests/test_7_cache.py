@@ -0,0 +1,64 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Test the cache of the grid and positions"""
+
+import os
+import pathlib
+import numpy as np
+from pofff.utils.cache import cache_key, load_cache, save_cache
+
+testpth: pathlib.Path = pathlib.Path(__file__).parent
+mainpth: pathlib.Path = pathlib.Path(__file__).parents[1]
+
+
+def test_cache():
+    """Store and restore the values, and evict the least recently used entries"""
+    folder = f"{testpth}/output/cache"
+    os.makedirs(f"{folder}/deck", exist_ok=True)
+    for name in os.listdir(folder):
+        if name.startswith("grid_"):
+            os.remove(f"{folder}/{name}")
+    dic = {
+        "path": f"{mainpth}/src/pofff",
+        "deck": f"{folder}/deck",
+        "cache": folder,
+        "cache_size": 500,
+        "grid": "cartesian",
+        "x": 28,
+        "y": 1,
+        "z": 12,
+        "thickness": 0,
+        "mult_thickness": 0,
+        "sources": [[0.9, 0.005, 0.3], [1.7, 0.005, 0.7]],
+        "dims": [2.8, 0.01, 1.2],
+    }
+    assert not load_cache(dic), "Issue with the test_7_cache.py"
+    values = {
+        "noCells": [28, 1, 12],
+        "xmx": np.linspace(0, 2.8, 29),
+        "fluxnum": np.arange(336, dtype=np.int8) % 7,
+        "multpv": np.linspace(0.5, 1.5, 336),
+        "sensorijk": [[3, 0, 4], [20, 0, 7]],
+        "cellmap": np.arange(336),
+    }
+    dic.update(values)
+    save_cache(dic)
+    new = {name: value for name, value in dic.items() if name not in values}
+    assert load_cache(new), "Issue with the test_7_cache.py"
+    for name, value in values.items():
+        assert np.array_equal(new[name], value), "Issue with the test_7_cache.py"
+        assert isinstance(new[name], type(value)), "Issue with the test_7_cache.py"
+    assert new["fluxnum"].dtype == np.int8, "Issue with the test_7_cache.py"
+    assert np.array_equal(
+        np.load(f"{folder}/deck/cellmap.npy"), values["cellmap"]
+    ), "Issue with the test_7_cache.py"
+    # Other grid entries use another entry, and the oldest ones are removed
+    dic["x"], dic["cache_size"] = 56, 1e-6
+    key = cache_key(dic)
+    assert key not in new["cache_file"], "Issue with the test_7_cache.py"
+    dic["cache_file"] = f"{folder}/grid_{key}.npz"
+    save_cache(dic)
+    assert [name for name in os.listdir(folder) if name.startswith("grid_")] == [
+        f"grid_{key}.npz"
+    ], "Issue with the test_7_cache.py"
@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Test the keyword files written for OPM Flow"""
+
+import os
+import pathlib
+import numpy as np
+from pofff.utils.writefile import (
+    compact_format,
+    create_corner_point_grid,
+    e_format,
+    write_keywords,
+)
+
+testpth: pathlib.Path = pathlib.Path(__file__).parent
+
+
+def read_include(file_name):
+    """Values of the keywords in a text file, expanding the 'n*x' notation"""
+    keywords, name = {}, None
+    with open(file_name, "r", encoding="utf8") as file:
+        for line in file:
+            if line.startswith("--"):
+                continue
+            for token in line.split():
+                if name is None:
+                    name, keywords[token] = token, []
+                elif token == "/":
+                    name = None
+                else:
+                    num, _, value = token.rpartition("*")
+                    keywords[name] += [float(value)] * int(num or 1)
+    return {name: np.array(values) for name, values in keywords.items()}
+
+
+def loop_compact_format(values):
+    """Previous value-by-value implementation of compact_format"""
+    n, value0, tmp = 0, float(values[0]), []
+    for value in values:
+        if value0 != float(value) or len(values) == 1:
+            if value0 == 0:
+                tmp.append(f"{n}*0 " if n > 1 else "0 ")
+            elif value0.is_integer():
+                tmp.append(f"{n}*{int(value0)} " if n > 1 else f"{int(value0)} ")
+            else:
+                tmp.append(f"{n}*{value0} " if n > 1 else f"{value0} ")
+            n = 1
+            value0 = float(value)
+        else:
+            n += 1
+    if value0 == float(values[-1]) and len(values) > 1:
+        if value0 == 0:
+            tmp.append(f"{n}*0 " if n > 1 else "0 ")
+        elif value0.is_integer():
+            tmp.append(f"{n}*{int(value0)} " if n > 1 else f"{int(value0)} ")
+        else:
+            tmp.append(f"{n}*{value0} " if n > 1 else f"{value0} ")
+    return tmp
+
+
+def test_compact_format():
+    """Same 'n*x' text as the previous loop for integers, floats and runs"""
+    rng = np.random.default_rng(0)
+    cases = [
+        [5],
+        [0.0],
+        [1, 2],
+        [3, 3],
+        rng.integers(0, 3, 500, dtype=np.int8),
+        np.repeat(rng.integers(-2, 8, 60), rng.integers(1, 5, 60)),
+        np.repeat(rng.random(40) * 1e-3, rng.integers(1, 4, 40)),
+        np.repeat([0.0, 1.5, 1.0, -0.25, 2.0e-7, 0.0], [4, 1, 3, 2, 1, 5]),
+    ]
+    for values in cases:
+        assert compact_format(values) == loop_compact_format(
+            list(values)
+        ), "Issue with the test_8_writefile.py"
+
+
+def test_e_format():
+    """Same rounding as reading back the ':E' text of each value"""
+    rng = np.random.default_rng(0)
+    values = np.concatenate(
+        (
+            rng.random(10000) * 1.2,
+            np.round(rng.random(10000) * 1.2, 7) + 5e-8,
+            rng.random(10000)
+            * np.logspace(-30, 30, 10000)
+            * rng.choice([-1, 1], 10000),
+            10.0 ** np.arange(-25, 25),
+            np.nextafter(10.0 ** np.arange(-25, 25), 0),
+            [0.0, -0.0, 1.2345665e5, 1.2345675, 9.9999996, 999.99951, 5e-324, 0.5],
+        )
+    )
+    assert np.array_equal(
+        e_format(values.reshape(-1, 2)).ravel(),
+        [float(f"{value:E}") for value in values],
+    ), "Issue with the test_8_writefile.py"
+
+
+def test_import():
+    """Same arrays in the IMPORT files as in the text files"""
+    from opm.io.ecl import EclFile  # pylint: disable=C0415
+
+    rng = np.random.default_rng(0)
+    ncx, ncz = 7, 5
+    xcoord = np.repeat(np.linspace(0, 2.8, ncx + 1), ncz + 1)
+    zcoord = (
+        np.tile(np.linspace(0, 1.2, ncz + 1), ncx + 1)
+        + rng.random((ncx + 1) * (ncz + 1)) * 1e-2 / 3
+    )
+    dic = {
+        "grid": "corner-point",
+        "noCells": [ncx, 1, ncz],
+        "ymy": [0.0, 0.01],
+        "fluxnum": rng.integers(1, 8, ncx * ncz),
+        "fipnum": rng.integers(1, 13, ncx * ncz),
+        "multpv": np.repeat(rng.random(7) * 1e3, 5),
+    }
+    arrays = {}
+    for binary in [False, True]:
+        dic["binary"] = binary
+        dic["deck"] = f"{testpth}/output/writefile/{'binary' if binary else 'text'}"
+        os.makedirs(dic["deck"], exist_ok=True)
+        create_corner_point_grid(dic, xcoord, zcoord)
+        write_keywords(dic)
+        arrays[binary] = {}
+        for name in os.listdir(dic["deck"]):
+            if binary:
+                ecl = EclFile(f"{dic['deck']}/{name}")
+                for keyword, *_ in ecl.arrays:
+                    arrays[binary][keyword] = np.asarray(ecl[keyword])
+            else:
+                arrays[binary].update(read_include(f"{dic['deck']}/{name}"))
+    assert sorted(arrays[True]) == sorted(
+        ["COORD", "ZCORN", "FLUXNUM", "FIPNUM", "MULTPV"]
+        + ["MULTX", "MULTX-", "MULTZ", "MULTZ-"]
+    ), "Issue with the test_8_writefile.py"
+    assert sorted(arrays[True]) == sorted(
+        arrays[False]
+    ), "Issue with the test_8_writefile.py"
+    for keyword, values in arrays[True].items():
+        assert (
+            values.shape == arrays[False][keyword].shape
+        ), "Issue with the test_8_writefile.py"
+        if keyword in ["COORD", "ZCORN"]:
+            # The text files are rounded as in the ':E' format
+            assert np.allclose(
+                values, arrays[False][keyword], rtol=1e-6, atol=0
+            ), "Issue with the test_8_writefile.py"
+        else:
+            assert np.array_equal(
+                values, arrays[False][keyword]
+            ), "Issue with the test_8_writefile.py"
+    assert (
+        arrays[True]["FIPNUM"].dtype.kind == "i"
+    ), "Issue with the test_8_writefile.py"
@@ -0,0 +1,146 @@
+# SPDX-FileCopyrightText: 2025 NORCE Research AS
+# SPDX-License-Identifier: GPL-3.0
+
+"""Test the readers of the OPM output files and the interpolation in the data job"""
+
+import os
+import pathlib
+import numpy as np
+import pytest
+from scipy.interpolate import interp1d
+from pofff.jobs.data import (
+    ECL_TYPES,
+    index_file,
+    interpolate,
+    read_array,
+    report_times,
+)
+
+testpth: pathlib.Path = pathlib.Path(__file__).parent
+
+
+def write_record(file, data):
+    """Write a Fortran record enclosed by the 4-byte markers"""
+    marker = np.array([len(data)], ">i4").tobytes()
+    file.write(marker + data + marker)
+
+
+def dtype_block(kind):
+    """Numpy type and values per record of an array type"""
+    if kind[:2] == "C0":
+        return f"S{int(kind[1:])}", 105
+    return ECL_TYPES[kind]
+
+
+def write_ecl(name, arrays):
+    """Write the arrays as an unformatted OPM output file"""
+    with open(name, "wb") as file:
+        for keyword, kind, values in arrays:
+            dtype, block = dtype_block(kind)
+            values = np.asarray(values, dtype)
+            header = f"{keyword:<8}".encode()
+            header += np.array([values.size], ">i4").tobytes() + kind.encode()
+            write_record(file, header)
+            for i in range(0, values.size, block):
+                write_record(file, values[i : i + block].tobytes())
+
+
+def read_ecl(name):
+    """Read all the arrays one record at a time"""
+    arrays = []
+    with open(name, "rb") as file:
+        while file.read(4):
+            header = file.read(16)
+            file.read(4)
+            dtype, block = dtype_block(header[12:16].decode())
+            count = int.from_bytes(header[8:12], "big", signed=True)
+            values = []
+            for i in range(0, count, block):
+                size = min(block, count - i) * np.dtype(dtype).itemsize
+                file.read(4)
+                values.append(np.frombuffer(file.read(size), dtype))
+                file.read(4)
+            values = np.concatenate(values) if values else np.empty(0, dtype)
+            arrays.append((header[:8].decode().strip(), values))
+    return arrays
+
+
+def test_read_array():
+    """Same values from the memory map as reading the records one by one"""
+    rng = np.random.default_rng(0)
+    arrays = [
+        ("INTEHEAD", "INTE", rng.integers(-5, 500, 411)),
+        ("DOUBHEAD", "DOUB", rng.random(229) * 1e5),
+        ("PORV", "REAL", rng.random(1000)),
+        ("NAMES", "CHAR", [f"NAME{i}".encode() for i in range(230)]),
+        ("LONGNAME", "C020", [b"A" * 20, b"B" * 3, b"C"]),
+        ("LOGIHEAD", "LOGI", rng.integers(0, 2, 121)),
+        ("ENDSOL", "MESS", []),
+    ]
+    for step in range(3):
+        arrays.append(("SEQNUM", "INTE", [step]))
+        arrays.append(("RSW", "REAL", rng.random(2345)))
+        arrays.append(("PRESSURE", "DOUB", rng.random(999) * 1e7))
+    name = f"{testpth}/output/data/TEST.UNRST"
+    os.makedirs(os.path.dirname(name), exist_ok=True)
+    write_ecl(name, arrays)
+    ecl, occurrences = index_file(name), {}
+    for keyword, values in read_ecl(name):
+        occurrence = occurrences[keyword] = occurrences.get(keyword, -1) + 1
+        result = read_array(ecl, keyword, occurrence)
+        assert np.array_equal(result, values), "Issue with the test_9_data.py"
+        assert result.dtype.isnative, "Issue with the test_9_data.py"
+        if values.size:
+            # Cells in the complete records and in the last one, unordered
+            cells = rng.integers(0, values.size, 50)
+            cells[:2] = [0, values.size - 1]
+            assert np.array_equal(
+                read_array(ecl, keyword, occurrence, cells), values[cells]
+            ), "Issue with the test_9_data.py"
+    assert occurrences["RSW"] == 2, "Issue with the test_9_data.py"
+
+
+def test_interpolate():
+    """Same interpolation and extrapolation as scipy's interp1d"""
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.random(20) * 1e5)
+    x[0] = 0.0
+    y = rng.random((20, 11)) * 1e3
+    x_new = np.append(np.linspace(0, 1.2e5, 97), [x[5], -10.0])
+    expected = interp1d(x, y, axis=0, fill_value="extrapolate")(x_new)
+    assert np.array_equal(
+        interpolate(list(x), y, x_new), expected
+    ), "Issue with the test_9_data.py"
+
+
+def test_report_times():
+    """Start of the injection from the restart steps, as the sources are not wells"""
+    rng = np.random.default_rng(0)
+    days = np.concatenate((np.linspace(0, 1, 5), 1 + np.cumsum(rng.random(20) / 24)))
+    arrays = []
+    for step, day in enumerate(days):
+        arrays.append(("SEQNUM", "INTE", [step]))
+        arrays.append(("DOUBHEAD", "DOUB", [day] + [0.0] * 228))
+        # No dissolved co2 during the equilibration (first five steps)
+        arrays.append(("RSW", "REAL", rng.random(300) * (step > 4)))
+    name = f"{testpth}/output/data/SOURCE.UNRST"
+    os.makedirs(os.path.dirname(name), exist_ok=True)
+    write_ecl(name, arrays)
+    # Summary of a deck with SOURCE: no wells, then the injection totals are zero
+    dig = {"sim": name[:-6], "unrst": index_file(name), "norst": len(days)}
+    dig["smspec"] = {"TIME": days[1:], "FGIT": np.zeros(len(days) - 1)}
+    report_times(dig)
+    assert dig["rst_initial"] == 4, "Issue with the test_9_data.py"
+    assert dig["time_initial"] == 86400 * days[4], "Issue with the test_9_data.py"
+    assert dig["times"] == [0] + [
+        float(f"{86400 * day:.0f}") - 86400 * days[4] for day in days[5:]
+    ], "Issue with the test_9_data.py"
+    assert dig["times_summary"] == [0.0] + list(
+        86400.0 * days[1:]
+    ), "Issue with the test_9_data.py"
+    # Without dissolved co2 the start cannot be found
+    name = f"{testpth}/output/data/NOINJECTION.UNRST"
+    write_ecl(name, arrays[: 3 * 5])
+    dig.update({"sim": name[:-6], "unrst": index_file(name), "norst": 5})
+    with pytest.raises(ValueError):
+        report_times(dig)